@@ -23,6 +23,11 @@ def main():
     ts.index.cond.get_condition("weekday", dummy=False)
     ts.index.cond.get_condition("hour")
     ts.index.cond.get_condition("hour", dummy=False)
+    peak = {hour: "peak" if 8 <= hour <= 20 else "offpeak" for hour in range(1, 25)}
+    ts.index.cond.get_condition("hour", mapping=peak)
+    ts.index.cond.get_condition("hour", mapping=peak, dummy=False)
+    ts.index.cond.get_condition("month", mapping={1: "jan"})
+    ts.index.cond.get_condition("month", mapping={1: "jan"}, dummy=False)
     ts.index.cond.get_conditions(["season", "daytype"])
     ts.index.cond.get_conditions(["season", "daytype"], combined=False)
     ts.index.cond.get_conditions(["season", "daytype"], dummy=False)
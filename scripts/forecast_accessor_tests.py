@@ -1,3 +1,5 @@
+from pathlib import Path
+
 import pandas as pd
 
 import forecast
@@ -22,7 +24,7 @@ def read_limit_normalize():
     ts = ts.fcst.normalize_index()
 
 
-def fit_predict_plot():
+def fit_predict_plot(png):
     global ts
 
     ts = ts.fcst.fit_model()
@@ -31,7 +33,8 @@ def fit_predict_plot():
         first_day_of_forecast=settings.forecast_start_date,
         include_training_years=settings.include_training_years,
     )
-    ts.fcst.plot()
+    # Rendered to a file, so batch runs are not blocked by a window.
+    ts.fcst.plot(output_filepath=locations.output / png)
 
 
 def process_and_write_to(csv):
@@ -39,7 +42,7 @@ def process_and_write_to(csv):
         def wrapper():
             read_limit_normalize()
             fun()
-            fit_predict_plot()
+            fit_predict_plot(png=Path(csv).with_suffix(".png"))
             ts.fcst.write_time_series(
                 output_filepath=locations.output / csv,
             )
@@ -253,7 +256,10 @@ def match_timezone():
         first_day_of_forecast=settings.forecast_start_date,
         include_training_years=settings.include_training_years,
     )
+    last = ts.fcst.model.forecast.index.max()
     ts = ts.fcst.match_tz(settings.tz)
+    if ts.fcst.model.forecast.index.max().tz_localize(None) != last:
+        raise ValueError(f"Converted index does not end at {last}.")
 
 
 def main():
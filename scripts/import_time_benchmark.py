@@ -0,0 +1,55 @@
+import statistics
+import subprocess
+import sys
+import time
+
+
+NUMBER_OF_RUNS = 5
+# Regression threshold for the median time of `import forecast`.
+THRESHOLD_S = 1.5
+# Modules which must be imported only on first use.
+LAZY_MODULES = ("prophet", "cmdstanpy", "holidays", "matplotlib")
+CHECK = (
+    "import sys; import forecast; "
+    f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+)
+
+
+def measure():
+    # return: float, seconds of a fresh interpreter importing the package
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import forecast"], check=True)
+    return time.perf_counter() - start
+
+
+def measure_python():
+    # return: float, seconds of a fresh interpreter importing nothing
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    eager = subprocess.run(
+        [sys.executable, "-c", CHECK],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    baseline = statistics.median(measure_python() for _ in range(NUMBER_OF_RUNS))
+    median = statistics.median(measure() for _ in range(NUMBER_OF_RUNS))
+    print(f"interpreter_s: {baseline:.3f}")
+    print(f"import_forecast_s: {median:.3f}")
+    print(f"threshold_s: {THRESHOLD_S:.3f}")
+    failed = False
+    if eager:
+        print(f"Imported eagerly: {eager}.")
+        failed = True
+    if median > THRESHOLD_S:
+        print("Import time regression.")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
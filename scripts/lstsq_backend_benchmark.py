@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+import forecast
+
+from setup import locations
+from setup import settings
+
+
+WINDOW = pd.DateOffset(years=1)
+SEASONALITIES = (
+    {
+        "kind": "yearly",
+        "mode": "force",
+        "conditions": None,
+    },
+    {
+        "kind": "weekly",
+        "mode": "force",
+        "conditions": ("month",),
+    },
+    {
+        "kind": "daily",
+        "mode": "force",
+        "conditions": ("month", "weekday"),
+    },
+)
+
+
+def main():
+    raw = forecast.read_time_series(
+        input_filepath=locations.input / settings.training,
+    )
+    end = pd.Timestamp(settings.training_end_date)
+    ts = raw.fcst.limit_training_set(
+        start_date=end - WINDOW,
+        end_date=end - pd.Timedelta(hours=1),
+    )
+    ts = ts.fcst.normalize_index()
+    ts = ts.fcst.add_seasonalities(*SEASONALITIES)
+    records = []
+    forecasts = {}
+    for backend in ("stan", "lstsq"):
+        start = time.perf_counter()
+        fitted = ts.fcst.set_backend(backend).fcst.fit_model()
+        fit_time = time.perf_counter() - start
+        fitted = fitted.fcst.predict(
+            number_of_forecast_years=1,
+            first_day_of_forecast=end,
+            include_training_years=True,
+        )
+        forecasts[backend] = fitted.fcst.model.forecast["yhat"].to_numpy()
+        records.append(
+            {
+                "backend": backend,
+                "fit_s": fit_time,
+                "beta": fitted.fcst.model.fit.params["beta"],
+            }
+        )
+    stan, lstsq = records
+    print(pd.DataFrame(data=records)[["backend", "fit_s"]].to_string(index=False))
+    print(f"speedup: {stan['fit_s'] / lstsq['fit_s']:.1f}")
+    print(f"max_abs_beta_diff: {np.abs(stan['beta'] - lstsq['beta']).max():.3g}")
+    yhat_diff = np.abs(forecasts["stan"] - forecasts["lstsq"])
+    print(f"max_abs_yhat_diff: {yhat_diff.max():.3g}")
+    print(f"max_rel_yhat_diff: {(yhat_diff / np.abs(forecasts['stan'])).max():.3g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import json
+import platform
+import statistics
+import tempfile
+import time
+from importlib import metadata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import forecast
+
+from setup import locations
+from setup import settings
+
+
+SYNTHETIC_YEARS = (1, 5, 20, 50)
+SYNTHETIC_START = "2000-01-01"
+SEED = 0
+DATASETS = ("prices", *(f"synthetic_{years}y" for years in SYNTHETIC_YEARS))
+STAGES = (
+    "read_time_series",
+    "normalize_index",
+    "get_condition",
+    "get_conditions_dummy",
+    "get_conditions_combined",
+    "add_regressor",
+    "fit_model",
+    "predict",
+    "match_tz",
+    "write_time_series",
+)
+SEASONALITIES = (
+    {
+        "kind": "yearly",
+        "mode": "force",
+        "conditions": None,
+    },
+    {
+        "kind": "weekly",
+        "mode": "force",
+        "conditions": ("month",),
+    },
+    {
+        "kind": "daily",
+        "mode": "force",
+        "conditions": ("month", "weekday"),
+    },
+)
+# Runs slower than the baseline by more than this ratio are reported.
+TOLERANCE = 1.2
+PACKAGES = ("pandas", "numpy", "prophet", "pyarrow")
+
+
+def make_synthetic(years):
+    # `years`: int
+    # return: dataframe with hourly series with daily, weekly and yearly
+    # seasonality and noise, the same for every run
+    index = pd.date_range(
+        start=SYNTHETIC_START,
+        periods=int(years * 365.25 * 24),
+        freq="h",
+        name="ds",
+    )
+    t = np.arange(len(index)) / 24
+    rng = np.random.default_rng(SEED)
+    y = (
+        100
+        + 20 * np.sin(2 * np.pi * t)
+        + 10 * np.sin(2 * np.pi * t / 7)
+        + 30 * np.sin(2 * np.pi * t / 365.25)
+        + rng.normal(scale=5, size=len(index))
+    )
+    return pd.DataFrame(data={"y": y}, index=index)
+
+
+def timed(fun, repeat):
+    # `fun`: callable without arguments
+    # `repeat`: int
+    # return: tuple of the result of the last call and list of seconds
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fun()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def run_dataset(name, stages, repeat, backend, directory):
+    # `name`: str, one of DATASETS
+    # `stages`: tuple of str, stages to time, others are run once untimed
+    # `repeat`: int
+    # `backend`: str, fitting backend
+    # `directory`: Path, for temporary files
+    # return: list of dicts with results
+    if name == "prices":
+        input_filepath = locations.input / settings.training
+    else:
+        input_filepath = directory / f"{name}.csv"
+        years = int(name.removeprefix("synthetic_").removesuffix("y"))
+        make_synthetic(years).to_csv(input_filepath)
+    records = []
+
+    def stage(stage_name, fun):
+        if stage_name not in stages:
+            return fun()
+        result, times = timed(fun, repeat)
+        records.append(
+            {
+                "dataset": name,
+                "stage": stage_name,
+                "rows": len(ts),
+                "min_s": min(times),
+                "median_s": statistics.median(times),
+            }
+        )
+        print(f"{name:>14} {stage_name:>24} {min(times):10.4f} s")
+        return result
+
+    ts = forecast.read_time_series(input_filepath=input_filepath)
+    ts = stage("read_time_series", lambda: forecast.read_time_series(input_filepath))
+    ts = stage("normalize_index", lambda: ts.fcst.normalize_index())
+    stage("get_condition", lambda: ts.index.cond.get_condition("month"))
+    stage(
+        "get_conditions_dummy",
+        lambda: ts.index.cond.get_conditions(("month", "weekday", "hour")),
+    )
+    stage(
+        "get_conditions_combined",
+        lambda: ts.index.cond.get_conditions(("month", "weekday"), dummy=False),
+    )
+    end = ts.index.max().normalize()
+    spans = (
+        (str(end - pd.Timedelta(days=60)), str(end - pd.Timedelta(days=30))),
+        (str(end - pd.Timedelta(days=7)), str(end + pd.Timedelta(days=60))),
+    )
+    ts = ts.fcst.add_seasonalities(*SEASONALITIES).fcst.set_backend(backend)
+    ts = stage(
+        "add_regressor",
+        lambda: ts.fcst.add_regressor(description="outage", spans=spans),
+    )
+    ts = stage("fit_model", lambda: ts.fcst.fit_model())
+    first_day_of_forecast = end + pd.Timedelta(days=1)
+    ts = stage(
+        "predict",
+        lambda: ts.fcst.predict(
+            number_of_forecast_years=1,
+            first_day_of_forecast=first_day_of_forecast,
+            include_training_years=False,
+        ),
+    )
+    last = ts.fcst.model.forecast.index.max()
+    ts = stage("match_tz", lambda: ts.fcst.match_tz(settings.tz))
+    if ts.fcst.model.forecast.index.max().tz_localize(None) != last:
+        raise ValueError(f"Converted index does not end at {last}.")
+    stage(
+        "write_time_series",
+        lambda: ts.fcst.write_time_series(directory / f"{name}_forecast.csv"),
+    )
+    return records
+
+
+def get_meta(backend, repeat):
+    # return: dict describing the environment of the run
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "created": pd.Timestamp.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "backend": backend,
+        "repeat": repeat,
+        "versions": versions,
+    }
+
+
+def compare(results, baseline_filepath):
+    # `results`: list of dicts, as returned by `run_dataset` function
+    # `baseline_filepath`: Path, JSON written by an earlier run
+    # return: bool, True if no stage is slower than the tolerance allows
+    baseline = json.loads(Path(baseline_filepath).read_text())["results"]
+    merged = pd.DataFrame(data=results).merge(
+        pd.DataFrame(data=baseline),
+        on=["dataset", "stage"],
+        suffixes=("", "_baseline"),
+    )
+    merged["ratio"] = merged["min_s"] / merged["min_s_baseline"]
+    merged["slower"] = merged["ratio"] > TOLERANCE
+    columns = ["dataset", "stage", "min_s_baseline", "min_s", "ratio", "slower"]
+    print(merged[columns].to_string(index=False))
+    return not merged["slower"].any()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the forecasting pipeline.")
+    parser.add_argument("--datasets", nargs="+", choices=DATASETS, default=DATASETS)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", default="stan")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=locations.output / "benchmarks" / "latest.json",
+    )
+    parser.add_argument("--baseline", type=Path, default=None)
+    args = parser.parse_args()
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.datasets:
+            results.extend(
+                run_dataset(
+                    name,
+                    stages=tuple(args.stages),
+                    repeat=args.repeat,
+                    backend=args.backend,
+                    directory=Path(directory),
+                )
+            )
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(
+        json.dumps(
+            {"meta": get_meta(args.backend, args.repeat), "results": results},
+            indent=2,
+        )
+    )
+    print(f"Results written to {args.output}.")
+    if (args.baseline is not None) and not compare(results, args.baseline):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import forecast
+
+from setup import locations
+from setup import settings
+
+
+FULL_CONDITIONAL_SEASONALITIES = (
+    {
+        "kind": "yearly",
+        "mode": "force",
+        "conditions": None,
+    },
+    {
+        "kind": "weekly",
+        "mode": "force",
+        "conditions": ("month",),
+    },
+    {
+        "kind": "daily",
+        "mode": "force",
+        "conditions": ("month", "weekday"),
+    },
+)
+SHOCKS = ({"description": "dec_23", "spans": (("2023-12-18", "2023-12-31"),)},)
+REGRESSORS = (
+    {
+        "description": "wdb",
+        "spans": (
+            ("2024-06-24", "2024-08-04"),
+            ("2024-08-05", "2024-09-01"),
+        ),
+    },
+)
+
+
+def get_scenarios():
+    # return: tuple of Scenario
+    return (
+        forecast.Scenario(
+            name="1_yearly_auto",
+            seasonalities=({"kind": "yearly", "mode": "auto"},),
+        ),
+        forecast.Scenario(
+            name="2_yearly_auto_weekly_auto",
+            seasonalities=(
+                {"kind": "yearly", "mode": "auto"},
+                {"kind": "weekly", "mode": "auto"},
+            ),
+        ),
+        forecast.Scenario(
+            name="3_yearly_auto_weekly_auto_daily_auto",
+            seasonalities=(
+                {"kind": "yearly", "mode": "auto"},
+                {"kind": "weekly", "mode": "auto"},
+                {"kind": "daily", "mode": "auto"},
+            ),
+        ),
+        forecast.Scenario(
+            name="5_full_conditional_seasonalities_at_once",
+            seasonalities=FULL_CONDITIONAL_SEASONALITIES,
+        ),
+        forecast.Scenario(
+            name="6_add_shocks",
+            seasonalities=FULL_CONDITIONAL_SEASONALITIES,
+            shocks=SHOCKS,
+        ),
+        forecast.Scenario(
+            name="7_regressors",
+            seasonalities=FULL_CONDITIONAL_SEASONALITIES,
+            shocks=SHOCKS,
+            regressors=REGRESSORS,
+        ),
+        forecast.Scenario(
+            name="8_country_holidays",
+            seasonalities=FULL_CONDITIONAL_SEASONALITIES,
+            shocks=SHOCKS,
+            regressors=REGRESSORS,
+            country=settings.country,
+        ),
+        forecast.Scenario(
+            name="9_match_timezone",
+            tz=settings.tz,
+        ),
+    )
+
+
+def main():
+    # Only the training range is loaded from the file.
+    ts = forecast.read_time_series(
+        input_filepath=locations.input / settings.training,
+        start=settings.training_start_date,
+        end=settings.training_end_date,
+    )
+    ts = ts.fcst.normalize_index()
+    for name, _ in forecast.run_scenarios(
+        ts,
+        get_scenarios(),
+        number_of_forecast_years=settings.number_of_forecast_years,
+        first_day_of_forecast=settings.forecast_start_date,
+        include_training_years=settings.include_training_years,
+        output_directory=locations.output,
+    ):
+        print(f"Scenario {name!r} written.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import time
+
+import pandas as pd
+
+import forecast
+
+from setup import locations
+from setup import settings
+
+
+WINDOW = pd.DateOffset(years=1)
+STEP = pd.DateOffset(days=1)
+NUMBER_OF_STEPS = 3
+SEASONALITIES = (
+    {
+        "kind": "yearly",
+        "mode": "force",
+        "conditions": None,
+    },
+    {
+        "kind": "weekly",
+        "mode": "force",
+        "conditions": ("month",),
+    },
+    {
+        "kind": "daily",
+        "mode": "force",
+        "conditions": ("month", "weekday"),
+    },
+)
+
+
+def prepare(ts, end):
+    ts = ts.fcst.limit_training_set(
+        start_date=end - WINDOW,
+        end_date=end - pd.Timedelta(hours=1),
+    )
+    ts = ts.fcst.normalize_index()
+    ts = ts.fcst.add_seasonalities(*SEASONALITIES)
+    return ts
+
+
+def main():
+    raw = forecast.read_time_series(
+        input_filepath=locations.input / settings.training,
+    )
+    first_end = pd.Timestamp(settings.training_end_date) - NUMBER_OF_STEPS * STEP
+    # The first window is fitted once to provide parameters for the warm
+    # start of the next one.
+    previous = prepare(raw, first_end).fcst.fit_model().fcst.model.fit
+    records = []
+    for step in range(1, NUMBER_OF_STEPS + 1):
+        ts = prepare(raw, first_end + step * STEP)
+        start = time.perf_counter()
+        cold = ts.fcst.fit_model()
+        cold_time = time.perf_counter() - start
+        start = time.perf_counter()
+        warm = ts.fcst.fit_model(warm_start=previous)
+        warm_time = time.perf_counter() - start
+        cold_params = cold.fcst.model.fit.params
+        warm_params = warm.fcst.model.fit.params
+        records.append(
+            {
+                "window_end": ts.index.max(),
+                "cold_s": cold_time,
+                "warm_s": warm_time,
+                "speedup": cold_time / warm_time,
+                "max_abs_beta_diff": abs(
+                    cold_params["beta"] - warm_params["beta"]
+                ).max(),
+            }
+        )
+        previous = warm.fcst.model.fit
+    results = pd.DataFrame(data=records)
+    print(results.to_string(index=False))
+    print(results[["cold_s", "warm_s"]].mean().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,16 @@ import logging
 
 # Importing accessors module installs them.
 from forecast import accessors
+from forecast.caches import ModelCache
+from forecast.calendars import configure_calendar
+from forecast.classes import Scenario
 from forecast.helpers import read_time_series
+from forecast.helpers import write_time_series_dataset
+from forecast.instruments import add_hook
+from forecast.instruments import instrument
+from forecast.instruments import remove_hook
+from forecast.panels import run_series
+from forecast.scenarios import run_scenarios
 
 
 logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -1,25 +1,52 @@
+from dataclasses import replace
+
 import numpy as np
 import pandas as pd
-import prophet as ph
-from matplotlib import pyplot as plt
 
+from forecast.backtests import backtest
+from forecast.caches import fingerprint
+from forecast.calendars import get_codes
+from forecast.calendars import extend_holidays
+from forecast.calendars import get_holidays
+from forecast.classes import Model
 from forecast.classes import Regressor
 from forecast.classes import Seasonality
 from forecast.classes import Shock
 from forecast.constants import DAYTYPE
 from forecast.constants import EXOGENOUS_VARIABLE_NAME
+from forecast.constants import FITTING_BACKENDS
 from forecast.constants import HOUR
 from forecast.constants import INDEX_NAME
 from forecast.constants import INDEX_TYPE
 from forecast.constants import MONTH
+from forecast.constants import PLOT_MAX_POINTS
 from forecast.constants import SEASON
 from forecast.constants import WEEKDAY
 from forecast.decorators import _work_on_copy
+from forecast.engines import predict_flat
 from forecast.exceptions import ConditionKindError
+from forecast.exceptions import FittingBackendError
+from forecast.exceptions import PredictionEngineError
 from forecast.exceptions import SeasonalityKindError
 from forecast.exceptions import SeasonalityModeError
+from forecast.features import get_coverage
+from forecast.features import get_future
+from forecast.features import get_regressor_features
+from forecast.features import get_seasonality_features
+from forecast.features import join_features
+from forecast.fitting import fit_lstsq
+from forecast.fitting import fit_warm
+from forecast.fitting import predict
 from forecast.helpers import match_tz
-from forecast.helpers import merge_spans
+from forecast.helpers import match_tzs
+from forecast.helpers import normalize_index
+from forecast.helpers import write_time_series
+from forecast.instruments import phase
+from forecast.instruments import timed
+from forecast.plans import LazyForecast
+from forecast.plots import plot_forecast
+from forecast.spans import Spans
+from forecast.spans import parse_spans
 
 
 @pd.api.extensions.register_dataframe_accessor("fcst")
@@ -41,6 +68,11 @@ class ForecastAccessor:
                 f"variable values."
             )
 
+    def lazy(self):
+        # return: LazyForecast recording calls of builder methods, which
+        # are optimized and executed at once by `fit_model` or `predict`
+        return LazyForecast(self._obj)
+
     @_work_on_copy
     def limit_training_set(self, start_date, end_date):
         df = self._obj
@@ -51,15 +83,10 @@ class ForecastAccessor:
     def normalize_index(self):
         # return: dataframe
         df = self._obj
-        # Insert an empty index for the missing hour at the change to
-        # daylight saving time and average the values from repeated hours
-        # at the change from daylight saving time.
-        df = df.resample("h").mean()
-        # Filling in the value for the missing hour.
-        df = df.interpolate()
+        df = normalize_index(df)
         return df
 
-    @_work_on_copy
+    @_work_on_copy(deep=False)
     def add_seasonality(self, kind, mode, conditions=None):
         # `kind`: str, one of: 'yearly', 'weekly', 'daily'
         # `mode`: str, one of: 'auto', 'force'; if None -> 'auto'
@@ -90,14 +117,16 @@ class ForecastAccessor:
                     case "daily":
                         period = 1
                         fourier_order = 4
-        self.model.seasonalities.append(
-            Seasonality(
-                kind=kind,
-                mode=mode,
-                period=period,
-                fourier_order=fourier_order,
-                conditions=conditions,
-            )
+        seasonality = Seasonality(
+            kind=kind,
+            mode=mode,
+            period=period,
+            fourier_order=fourier_order,
+            conditions=conditions,
+        )
+        self.model = replace(
+            self.model,
+            seasonalities=(*self.model.seasonalities, seasonality),
         )
         return self._obj
 
@@ -120,32 +149,28 @@ class ForecastAccessor:
             df = df.fcst.add_seasonality(**seasonality)
         return df
 
-    @_work_on_copy
+    @_work_on_copy(deep=False)
     def add_shock(self, description, spans):
         # `description`: str
         # `spans`: tuple of tuples
         # return: dataframe
         model = self.model
-        data = []
-        for span in spans:
-            span = [pd.Timestamp(ds) for ds in span]
-            data.append(
-                {
-                    "holiday": description,
-                    "ds": span[0],
-                    "ds_end": span[1],
-                }
-            )
-        frame = pd.DataFrame(data=data)
+        starts, ends = parse_spans(*spans)
+        frame = pd.DataFrame(
+            data={
+                "holiday": description,
+                "ds": starts,
+                "ds_end": ends,
+            }
+        )
         frame["span"] = frame["ds_end"] - frame["ds"]
         frame["upper_window"] = frame["span"].dt.days
         frame["lower_window"] = 0
-        model.shocks.append(
-            Shock(
-                description=description,
-                frame=frame,
-            )
+        shock = Shock(
+            description=description,
+            frame=frame,
         )
+        self.model = replace(model, shocks=(*model.shocks, shock))
         return self._obj
 
     def add_shocks(self, *shocks):
@@ -156,43 +181,31 @@ class ForecastAccessor:
             df = df.fcst.add_shock(**shock)
         return df
 
-    @_work_on_copy
+    @_work_on_copy(deep=False)
     def add_regressor(self, description, spans):
         # `description`: str
         # `spans`: tuple of tuples
         # return: dataframe
         model = self.model
-        conds_to_test = [
-            ("month", "weekday"),
-            ("month", "daytype"),
-            ("season", "weekday"),
-            ("season", "daytype"),
-            ("weekday",),
-            ("daytype",),
-        ]
-        span = merge_spans(*spans)
+        span = Spans.from_tuples(*spans)
+        # Hours are needed here for their conditions only, the regressor
+        # keeps the intervals.
+        hours = span.to_index()
+        in_training = hours.isin(self._obj.index)
+        # Conditions are the first candidate whose combinations out of
+        # training were all seen in training.
+        coverage = get_coverage(hours, in_training)
+        covered = coverage.loc[coverage["covered"], "conditions"]
         conds = ("hour",)
-        in_training = span.isin(self._obj.index)
-        if in_training.all():
-            conds = (*conds_to_test[0], *conds)
-        else:
-            for test_conds in conds_to_test:
-                in_conds = span[in_training].cond.get_unique_conditions(
-                    kinds=test_conds,
-                )
-                out_conds = span[~in_training].cond.get_unique_conditions(
-                    kinds=test_conds,
-                )
-                if np.isin(out_conds, in_conds).all():
-                    conds = (*test_conds, *conds)
-                    break
-        model.regressors.append(
-            Regressor(
-                description=description,
-                span=span,
-                conditions=conds,
-            )
+        if not covered.empty:
+            conds = (*covered.iloc[0], *conds)
+        regressor = Regressor(
+            description=description,
+            span=span,
+            conditions=conds,
+            coverage=coverage,
         )
+        self.model = replace(model, regressors=(*model.regressors, regressor))
         return self._obj
 
     def add_regressors(self, *regressors):
@@ -203,17 +216,40 @@ class ForecastAccessor:
             df = df.fcst.add_regressor(**regressor)
         return df
 
-    @_work_on_copy
+    @_work_on_copy(deep=False)
     def add_country_holidays(self, country):
         # `country`: str, country code
         # return: dataframe
-        model = self.model
-        model.country = country
+        self.model = replace(self.model, country=country)
+        return self._obj
+
+    @_work_on_copy(deep=False)
+    def set_backend(self, backend):
+        # `backend`: str, one of: 'stan', 'lstsq'; 'lstsq' solves the MAP
+        # problem of flat growth with additive features by linear algebra
+        # return: dataframe
+        if backend not in FITTING_BACKENDS:
+            raise FittingBackendError(
+                f"There is no available fitting backend like {backend!r}."
+            )
+        self.model = replace(self.model, backend=backend)
         return self._obj
 
     @_work_on_copy
-    def fit_model(self):
+    def fit_model(self, cache=None, warm_start=None, features=None):
+        # `cache`: ModelCache, if given the fitted model is loaded from it
+        # when the training set and the model spec have not changed
+        # `warm_start`: fitted prophet.Prophet, e.g. from the previous
+        # training window, optimization starts from its parameters; not
+        # used by 'lstsq' backend
+        # `features`: tuple of dicts returned by `get_seasonality_features`
+        # and `get_regressor_features` functions for the training index,
+        # e.g. computed once for many series; if None -> computed here
         # return: dataframe
+        # Prophet with its Stan backend is imported on first fit, so it
+        # does not slow down `import forecast`.
+        import prophet as ph
+
         df = self._obj
         model = self.model
         init_kwargs = {
@@ -232,51 +268,83 @@ class ForecastAccessor:
             elif (seasonality.mode == "force") and (seasonality.conditions is None):
                 kwarg = "_".join((seasonality.kind, "seasonality"))
                 init_kwargs[kwarg] = True
-        # Handling shocks.
-        if model.shocks:
-            frames = [shock.frame for shock in model.shocks]
-            init_kwargs["holidays"] = pd.concat(frames)
+        # Handling shocks and holidays.
+        frames = [shock.frame for shock in model.shocks]
+        if model.country:
+            # Holidays are generated once per process and country, instead
+            # of by Prophet on every fit and predict, and come after the
+            # shocks the same way as in Prophet.
+            frames.append(get_holidays(df.index, model.country))
+        if frames:
+            # Only columns used by Prophet, so the fitted model can be
+            # serialized.
+            init_kwargs["holidays"] = pd.concat(frames, ignore_index=True).reindex(
+                columns=["holiday", "ds", "lower_window", "upper_window"]
+            )
         # Model initialization.
         model_ = ph.Prophet(**init_kwargs)
-        # Handling holidays.
-        if model.country:
-            model_.add_country_holidays(country_name=model.country)
+        if features is None:
+            with phase("conditions"):
+                features = (
+                    get_seasonality_features(df.index, model),
+                    get_regressor_features(df.index, model),
+                )
+        seasonality_features, regressor_features = features
         # Handling seasonalities with 'force' mode with conditions.
         for seasonality in model.seasonalities:
             if (seasonality.mode == "force") and (seasonality.conditions is not None):
-                conds_ = df.index.cond.get_conditions(seasonality.conditions)
-                cond_names = conds_.columns
-                for cond_name in cond_names:
+                conds_ = seasonality_features[seasonality.conditions]
+                for cond_name in conds_.columns:
                     model_.add_seasonality(
                         name="_".join((seasonality.kind, cond_name)),
                         period=seasonality.period,
                         fourier_order=seasonality.fourier_order,
                         condition_name=cond_name,
                     )
-                if not np.isin(cond_names, df.columns).all():
-                    df = df.join(conds_)
         # Handling regressors.
-        for regressor in model.regressors:
-            conds_ = regressor.span.cond.get_conditions(regressor.conditions)
-            conds_.rename(
-                columns=lambda name: regressor.description + "_" + name,
-                inplace=True,
-            )
-            cond_names = conds_.columns
-            for cond_name in cond_names:
+        for conds_ in regressor_features.values():
+            for cond_name in conds_.columns:
                 model_.add_regressor(cond_name)
-            df = df.join(conds_.reindex(index=df.index, fill_value=False))
-        # Model fitting.
-        model.fit = model_.fit(df.reset_index())
+        with phase("join"):
+            df = join_features(
+                df,
+                *seasonality_features.values(),
+                *regressor_features.values(),
+            )
+        # Model fitting, unless it is cached.
+        fit = None
+        if cache is not None:
+            key = fingerprint(df, model)
+            fit = cache.load(key)
+        if fit is None:
+            with phase("optimize"):
+                if model.backend == "lstsq":
+                    fit = fit_lstsq(model_, df.reset_index())
+                elif warm_start is not None:
+                    fit = fit_warm(model_, df.reset_index(), previous=warm_start)
+                else:
+                    fit = model_.fit(df.reset_index())
+            if cache is not None:
+                cache.save(key, fit, model)
+        self.model = replace(model, fit=fit)
         return df
 
-    @_work_on_copy
+    @_work_on_copy(deep=False)
     def predict(
-        self, number_of_forecast_years, first_day_of_forecast, include_training_years
+        self,
+        number_of_forecast_years,
+        first_day_of_forecast,
+        include_training_years,
+        intervals=False,
+        engine="prophet",
     ):
         # `number_of_forecast_years`: int
         # `first_day_of_forecast`: date str in ISO 8601 format
         # `include_training_years`: boolean
+        # `intervals`: boolean, if True uncertainty intervals are computed,
+        # otherwise only point forecast
+        # `engine`: str, one of: 'prophet', 'numpy'; 'numpy' computes point
+        # forecast directly from the fitted parameters
         # return: dataframe
         df = self._obj
         model = self.model
@@ -294,41 +362,112 @@ class ForecastAccessor:
             name="ds",
             inclusive="left",
         )
-        future = pd.DataFrame(index=index)
-        # Handling seasonalities with 'force' mode with conditions.
-        for seasonality in model.seasonalities:
-            if (seasonality.mode == "force") and (seasonality.conditions is not None):
-                conds_ = index.cond.get_conditions(seasonality.conditions)
-                cond_names = conds_.columns
-                if not np.isin(cond_names, future.columns).all():
-                    future = future.join(conds_)
-        # Handling regressors.
-        for regressor in model.regressors:
-            conds_ = regressor.span.cond.get_conditions(regressor.conditions)
-            conds_.rename(
-                columns=lambda name: regressor.description + "_" + name,
-                inplace=True,
-            )
-            future = future.join(conds_.reindex(index=index, fill_value=False))
-        model._forecast = model.fit.predict(future.reset_index())
-        model.forecast = model._forecast[["ds", "yhat"]].set_index("ds")
+        with phase("conditions"):
+            future = get_future(index, model)
+        fit = model.fit
+        if model.country:
+            fit = extend_holidays(fit, index, model.country)
+        with phase("predict"):
+            match engine:
+                case "prophet":
+                    _forecast = predict(
+                        fit,
+                        future.reset_index(),
+                        intervals=intervals,
+                    )
+                case "numpy" if not intervals:
+                    _forecast = predict_flat(fit, future)
+                case _:
+                    raise PredictionEngineError(
+                        f"There is no available prediction engine like {engine!r}"
+                        f"{' with intervals' if intervals else ''}."
+                    )
+        self.model = replace(
+            model,
+            forecast=_forecast[["ds", "yhat"]].set_index("ds"),
+            _forecast=_forecast,
+        )
         return df
 
-    @_work_on_copy
+    @_work_on_copy(deep=False)
     def match_tz(self, tz):
         # `tz`: str, e.g. 'Europe/Warsaw'
         # return: dataframe
         df = self.model.forecast
-        self.model.forecast = match_tz(df=df, tz=tz)
+        with phase("tz_conversion"):
+            df = match_tz(df=df, tz=tz)
+        self.model = replace(self.model, forecast=df)
         return self._obj
 
-    def plot(self):
-        self.model.fit.plot(self.model._forecast)
-        plt.show()
+    @timed
+    def match_tzs(self, *tzs):
+        # `tzs`: str, e.g. 'Europe/Warsaw', 'Europe/Berlin'
+        # return: dict with time zones as keys and forecasts with aware
+        # DatetimeIndex as values, the model is not changed
+        return match_tzs(df=self.model.forecast, tzs=tzs)
+
+    @timed
+    def backtest(self, initial, horizon, period, expanding=False, max_workers=None):
+        # `initial`: str or Timedelta, length of the (first) training set
+        # `horizon`: str or Timedelta, length of each test set
+        # `period`: str or Timedelta, spacing between the fold origins
+        # `expanding`: bool, if True each training set starts at the beginning
+        # of the time series, otherwise training sets roll with the origin
+        # `max_workers`: int, number of processes; if None -> number of CPUs
+        # return: dataframe with MAE, RMSE and sMAPE of every fold and of
+        # all folds together
+        return backtest(
+            ts=self._obj,
+            model=self.model or Model(),
+            initial=initial,
+            horizon=horizon,
+            period=period,
+            expanding=expanding,
+            max_workers=max_workers,
+        )
 
-    def write_time_series(self, output_filepath):
+    @timed
+    def plot(
+        self,
+        output_filepath=None,
+        start=None,
+        end=None,
+        components=(),
+        max_points=PLOT_MAX_POINTS,
+    ):
+        # `output_filepath`: str or Path, e.g. '.png', '.svg'; if given the
+        # plot is rendered there without a display, otherwise it is shown
+        # `start`, `end`: date str in ISO 8601 format, limits of the window
+        # `components`: tuple of names of forecast columns drawn in separate
+        # panels, e.g. ('trend', 'additive_terms')
+        # `max_points`: int, about the number of points drawn per line,
+        # keeping minima and maxima
+        # return: matplotlib Figure
+        return plot_forecast(
+            forecast=self.model._forecast,
+            history=self.model.fit.history,
+            output_filepath=output_filepath,
+            start=start,
+            end=end,
+            components=components,
+            max_points=max_points,
+        )
+
+    @timed
+    def write_time_series(
+        self, output_filepath, file_format=None, float_precision=None
+    ):
         # `output_filepath`: str
-        self.model.forecast.to_csv(path_or_buf=output_filepath)
+        # `file_format`: str, one of: 'csv', 'parquet', 'feather'; if None ->
+        # inferred from the file extension, e.g. '.csv.gz' for compressed CSV
+        # `float_precision`: int, number of decimal places; if None -> full
+        # precision
+        write_time_series(
+            df=self.model.forecast,
+            output_filepath=output_filepath,
+            file_format=file_format,
+            float_precision=float_precision,
+        )
 
 
 @pd.api.extensions.register_index_accessor("cond")
@@ -343,6 +482,7 @@ class ConditionAccessor:
         if not isinstance(obj, INDEX_TYPE):
             raise ValueError(f"Time series must have {INDEX_TYPE.__name__}-like index.")
 
+    @timed
     def get_condition(
         self,
         kind,
@@ -351,6 +491,7 @@ class ConditionAccessor:
         dummy=True,
         start_month=None,
         weekend=None,
+        sparse=False,
     ):
         # `kind`: str, one of: 'season', 'month', 'daytype', 'weekday', 'hour'
         # `mapping`: dict
@@ -358,40 +499,50 @@ class ConditionAccessor:
         # `dummy`: bool
         # `start_month`: int
         # `weekend`: tuple of weekend days
-        # return: dataframe
+        # `sparse`: bool, if True dummies are stored as sparse columns
+        # return: dataframe, with categorical labels if not `dummy`
         match kind:
             case "season":
-                start_month = start_month or 6
-                data = (self._obj.month - start_month) % 12 // 3 + 1
                 mapping = mapping or SEASON.mapping
                 name = name or SEASON.name
             case "month":
-                data = self._obj.month
                 mapping = mapping or MONTH.mapping
                 name = name or MONTH.name
             case "daytype":
-                weekend = weekend or (6, 7)
-                data = np.where((self._obj.dayofweek + 1).isin(weekend), 2, 1)
                 mapping = mapping or DAYTYPE.mapping
                 name = name or DAYTYPE.name
             case "weekday":
-                data = self._obj.dayofweek + 1
                 mapping = mapping or WEEKDAY.mapping
                 name = name or WEEKDAY.name
             case "hour":
-                data = self._obj.hour + 1
                 mapping = mapping or HOUR.mapping
                 name = name or HOUR.name
             case _:
                 raise ConditionKindError(
                     f"There is no available condition kind like {kind!r}."
                 )
-        cond = pd.Series(data=data, index=self._obj, name=name)
-        if mapping:
-            cond = cond.map(mapping)
-        cond = cond.to_frame()
+        # Codes are sliced from the calendar shared by the whole process.
+        data = get_codes(
+            index=self._obj,
+            kind=kind,
+            start_month=start_month,
+            weekend=weekend,
+        )
+        # Labels are kept as categorical over the codes present. Codes
+        # mapped to the same label share a category and codes missing
+        # from the mapping get -1, i.e. NaN.
+        counts = np.bincount(data)
+        present = np.flatnonzero(counts)
+        lookup = np.full(len(counts), -1, dtype=np.intp)
+        lookup[present], labels = pd.factorize(pd.Series(present).map(mapping))
+        labels = np.asarray(labels, dtype=object)
+        cond = pd.Series(
+            data=_sorted_categorical(lookup[data], labels),
+            index=self._obj,
+            name=name,
+        ).to_frame()
         if dummy:
-            cond = pd.get_dummies(cond, prefix=name)
+            cond = pd.get_dummies(cond, prefix=name, sparse=sparse, dtype=bool)
         return cond
 
     def get_season(self, **kwargs):
@@ -419,33 +570,68 @@ class ConditionAccessor:
         # return: dataframe
         return self.get_condition(kind="hour", **kwargs)
 
-    def get_conditions(self, kinds, dummy=True, combined=True):
+    @timed
+    def get_conditions(self, kinds, dummy=True, combined=True, sparse=False):
         # `kinds`: tuple, combination of `kind` argument for `get_condition` method; e.g. ('season', 'daytype')
         # `dummy`: bool
         # `combined`: bool
+        # `sparse`: bool, as for `get_condition` method
         # return: dataframe
         if len(kinds) == 1:
             (kind,) = kinds
-            return self.get_condition(kind=kind, dummy=dummy)
+            return self.get_condition(kind=kind, dummy=dummy, sparse=sparse)
         conds = []
         if not combined:
             for kind in kinds:
-                cond = self.get_condition(kind, dummy=dummy)
+                cond = self.get_condition(kind, dummy=dummy, sparse=sparse)
                 conds.append(cond)
             conds = pd.concat(conds, axis=1)
             return conds
         else:
+            # Conditions are combined as integer codes in mixed radix, so
+            # labels are joined only once per combination actually present.
+            codes = []
+            uniques = []
             for kind in kinds:
-                cond = self.get_condition(kind, dummy=False)
-                conds.append(cond)
-            conds = pd.concat(conds, axis=1)
-            combined = conds.apply(lambda row: "_".join(row), axis=1)
+                cond = self.get_condition(kind, dummy=False).squeeze(axis=1)
+                code, unique = pd.factorize(cond)
+                codes.append(code)
+                uniques.append(np.asarray(unique))
+            dims = [len(unique) for unique in uniques]
+            present, inverse = np.unique(
+                np.ravel_multi_index(codes, dims=dims),
+                return_inverse=True,
+            )
+            labels = np.array(
+                [
+                    "_".join(parts)
+                    for parts in zip(
+                        *(
+                            unique[code]
+                            for unique, code in zip(
+                                uniques, np.unravel_index(present, shape=dims)
+                            )
+                        )
+                    )
+                ],
+                dtype=object,
+            )
             name = "_".join(kinds)
-            combined = combined.to_frame(name=name)
+            combined = pd.Series(
+                data=_sorted_categorical(inverse, labels),
+                index=self._obj,
+                name=name,
+            ).to_frame()
             if dummy:
-                combined = pd.get_dummies(combined, prefix=name)
+                combined = pd.get_dummies(
+                    combined,
+                    prefix=name,
+                    sparse=sparse,
+                    dtype=bool,
+                )
             return combined
 
+    @timed
     def get_unique_conditions(self, kinds):
         # `kinds`: tuple, combination of `kind` argument for `get_condition` method; e.g. ('season', 'daytype')
         # return: ndarray
@@ -457,4 +643,18 @@ class ConditionAccessor:
             .squeeze()
             .unique()
         )
-        return unique_conds
+        return np.asarray(unique_conds)
+
+
+def _sorted_categorical(codes, labels):
+    # `codes`: ndarray with positions in `labels`, -1 for missing labels
+    # `labels`: ndarray with labels present
+    # return: Categorical with sorted categories, so the order of dummy
+    # columns is the same as for labels stored as strings
+    order = np.argsort(labels, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return pd.Categorical.from_codes(
+        codes=np.where(codes < 0, -1, rank[codes]),
+        categories=labels[order],
+    )
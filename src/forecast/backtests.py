@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from forecast.constants import EXOGENOUS_VARIABLE_NAME
+from forecast.features import get_future
+from forecast.features import get_regressor_features
+from forecast.features import get_seasonality_features
+from forecast.features import slice_features
+from forecast.fitting import predict
+from forecast.pools import imap_unordered
+
+
+_HOUR = pd.Timedelta(hours=1)
+
+
+@dataclass(frozen=True)
+class Fold:
+    number: int
+    train_start: pd.Timestamp
+    train_end: pd.Timestamp
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+
+
+def make_folds(index, initial, horizon, period, expanding=False):
+    # `index`: DatetimeIndex of the whole time series
+    # `initial`: str or Timedelta, length of the (first) training set
+    # `horizon`: str or Timedelta, length of each test set
+    # `period`: str or Timedelta, spacing between the fold origins
+    # `expanding`: bool, if True each training set starts at the beginning
+    # of the time series, otherwise training sets roll with the origin
+    # return: list of Fold, ends are excluded
+    initial, horizon, period = (
+        pd.Timedelta(initial),
+        pd.Timedelta(horizon),
+        pd.Timedelta(period),
+    )
+    first, end = index.min(), index.max() + pd.Timedelta(hours=1)
+    folds = []
+    origin = first + initial
+    while origin + horizon <= end:
+        folds.append(
+            Fold(
+                number=len(folds),
+                train_start=first if expanding else origin - initial,
+                train_end=origin,
+                test_start=origin,
+                test_end=origin + horizon,
+            )
+        )
+        origin += period
+    return folds
+
+
+def get_errors(actual, predicted):
+    # `actual`: array-like with actual values
+    # `predicted`: array-like with predicted values
+    # return: dict with MAE, RMSE and sMAPE (in percent)
+    actual, predicted = np.asarray(actual), np.asarray(predicted)
+    error = predicted - actual
+    scale = np.abs(actual) + np.abs(predicted)
+    ratio = np.divide(
+        2 * np.abs(error),
+        scale,
+        out=np.zeros_like(scale, dtype=float),
+        where=scale != 0,
+    )
+    return {
+        "mae": np.abs(error).mean(),
+        "rmse": np.sqrt((error**2).mean()),
+        "smape": 100 * ratio.mean(),
+    }
+
+
+def _run_fold(shared, fold):
+    ts, model, features = shared
+    # Ends are included by `loc`, so the last hours before the excluded
+    # ends are taken.
+    train_start, train_end = fold.train_start, fold.train_end - _HOUR
+    test_start, test_end = fold.test_start, fold.test_end - _HOUR
+    train = ts.loc[train_start:train_end]
+    test = ts.loc[test_start:test_end]
+    # Model spec is attributed to the training set the same way as done by
+    # the accessor methods.
+    train.fcst.model = model
+    train_features = slice_features(features, train_start, train_end)
+    model = train.fcst.fit_model(features=train_features).fcst.model
+    test_features = slice_features(features, test_start, test_end)
+    future = get_future(test.index, model, features=test_features)
+    predicted = predict(model.fit, future.reset_index())["yhat"].to_numpy()
+    actual = test[EXOGENOUS_VARIABLE_NAME].to_numpy()
+    return fold, actual, predicted
+
+
+def backtest(ts, model, initial, horizon, period, expanding=False, max_workers=None):
+    # `ts`: dataframe with normalized time series
+    # `model`: Model with seasonalities, shocks, regressors and country
+    # `initial`, `horizon`, `period`, `expanding`: as for `make_folds`
+    # `max_workers`: int, number of processes; if None -> number of CPUs
+    # return: dataframe with errors of every fold and of all folds
+    # together (fold 'all'), one row per metric
+    folds = make_folds(ts.index, initial, horizon, period, expanding=expanding)
+    if not folds:
+        raise ValueError("Time series is too short for any fold.")
+    # Model spec is sent without fitted model and forecast.
+    model = replace(model, fit=None, forecast=None, _forecast=None)
+    # Features are built once for the whole time series and sliced per
+    # fold, instead of being rebuilt by every fold.
+    features = (
+        get_seasonality_features(ts.index, model),
+        get_regressor_features(ts.index, model),
+    )
+    results = {}
+    for fold, actual, predicted in imap_unordered(
+        _run_fold,
+        folds,
+        shared=(ts, model, features),
+        max_workers=max_workers,
+    ):
+        results[fold.number] = (actual, predicted)
+    records = []
+    for fold in folds:
+        for metric, value in get_errors(*results[fold.number]).items():
+            records.append(_record(fold.number, fold, metric, value))
+    everything = Fold(
+        number=None,
+        train_start=folds[0].train_start,
+        train_end=folds[-1].train_end,
+        test_start=folds[0].test_start,
+        test_end=folds[-1].test_end,
+    )
+    actual, predicted = (np.concatenate(values) for values in zip(*results.values()))
+    for metric, value in get_errors(actual, predicted).items():
+        records.append(_record("all", everything, metric, value))
+    return pd.DataFrame(data=records)
+
+
+def _record(label, fold, metric, value):
+    return {
+        "fold": label,
+        "train_start": fold.train_start,
+        "train_end": fold.train_end,
+        "test_start": fold.test_start,
+        "test_end": fold.test_end,
+        "metric": metric,
+        "value": value,
+    }
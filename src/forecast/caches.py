@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+
+def _hash_pandas(obj):
+    # `obj`: dataframe, series or index
+    # return: bytes
+    return pd.util.hash_pandas_object(obj).to_numpy().tobytes()
+
+
+def fingerprint(df, model):
+    # `df`: dataframe with training set and all features
+    # `model`: Model
+    # return: str, hex digest of the training set and the model spec
+    digest = hashlib.sha256()
+    digest.update(_hash_pandas(df))
+    digest.update(repr(tuple(df.columns)).encode())
+    for seasonality in model.seasonalities:
+        digest.update(repr(seasonality).encode())
+    for shock in model.shocks:
+        digest.update(shock.description.encode())
+        digest.update(_hash_pandas(shock.frame))
+    for regressor in model.regressors:
+        digest.update(repr((regressor.description, regressor.conditions)).encode())
+        digest.update(regressor.span.starts.tobytes())
+        digest.update(regressor.span.stops.tobytes())
+    digest.update(repr(model.country).encode())
+    digest.update(repr(model.backend).encode())
+    return digest.hexdigest()
+
+
+class ModelCache:
+
+    def __init__(self, directory, max_size=1024**3):
+        # `directory`: str or Path, created if it does not exist
+        # `max_size`: int, bytes; least recently used models are evicted
+        # when the cache gets bigger
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+
+    def _paths(self, key):
+        return (
+            self.directory / f"{key}.json",
+            self.directory / f"{key}.meta.json",
+        )
+
+    def load(self, key):
+        # `key`: str, as returned by `fingerprint` function
+        # return: fitted prophet.Prophet, None if not cached
+        # Prophet is imported on first use, so it does not slow down
+        # `import forecast`.
+        from prophet.serialize import model_from_json
+
+        model_path, meta_path = self._paths(key)
+        try:
+            model_json = model_path.read_text()
+        except FileNotFoundError:
+            return None
+        # Modification time marks the recent use of the model.
+        os.utime(model_path)
+        return model_from_json(model_json)
+
+    def save(self, key, fit, model):
+        # `key`: str, as returned by `fingerprint` function
+        # `fit`: fitted prophet.Prophet
+        # `model`: Model, its spec is saved as metadata
+        from prophet.serialize import model_to_json
+
+        model_path, meta_path = self._paths(key)
+        meta = {
+            "seasonalities": [repr(seasonality) for seasonality in model.seasonalities],
+            "shocks": [shock.description for shock in model.shocks],
+            "regressors": [
+                [regressor.description, regressor.conditions]
+                for regressor in model.regressors
+            ],
+            "country": model.country,
+            "backend": model.backend,
+            "history_start": str(fit.history_dates.min()),
+            "history_end": str(fit.history_dates.max()),
+        }
+        meta_path.write_text(json.dumps(meta))
+        model_path.write_text(model_to_json(fit))
+        self._evict()
+
+    def info(self):
+        # return: dataframe with metadata of cached models, the most
+        # recently used first
+        records = []
+        for model_path in self._model_paths():
+            key = model_path.name.removesuffix(".json")
+            _, meta_path = self._paths(key)
+            meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+            stat = model_path.stat()
+            records.append(
+                {
+                    "key": key,
+                    "size": stat.st_size,
+                    "used": pd.Timestamp(stat.st_mtime, unit="s"),
+                    **meta,
+                }
+            )
+        frame = pd.DataFrame(data=records)
+        if not frame.empty:
+            frame = frame.sort_values("used", ascending=False, ignore_index=True)
+        return frame
+
+    def invalidate(self, key=None):
+        # `key`: str, as returned by `fingerprint` function; if None ->
+        # the whole cache is cleared
+        if key is None:
+            keys = [path.name.removesuffix(".json") for path in self._model_paths()]
+        else:
+            keys = [key]
+        for key in keys:
+            for path in self._paths(key):
+                path.unlink(missing_ok=True)
+
+    def _model_paths(self):
+        return [
+            path
+            for path in self.directory.glob("*.json")
+            if not path.name.endswith(".meta.json")
+        ]
+
+    def _evict(self):
+        paths = sorted(self._model_paths(), key=lambda path: path.stat().st_mtime)
+        size = sum(path.stat().st_size for path in paths)
+        while paths and (size > self.max_size):
+            path = paths.pop(0)
+            size -= path.stat().st_size
+            self.invalidate(path.name.removesuffix(".json"))
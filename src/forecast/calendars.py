@@ -0,0 +1,192 @@
+from copy import copy
+from functools import cache
+
+import numpy as np
+import pandas as pd
+
+from forecast.constants import CALENDAR_END
+from forecast.constants import CALENDAR_START
+from forecast.exceptions import ConditionKindError
+
+
+_HOUR = pd.Timedelta(hours=1).value
+
+
+def compute_codes(index, kind, start_month=None, weekend=None):
+    # `index`: DatetimeIndex
+    # `kind`: str, one of: 'season', 'month', 'daytype', 'weekday', 'hour'
+    # `start_month`: int
+    # `weekend`: tuple of weekend days
+    # return: ndarray with 1-based integer codes
+    match kind:
+        case "season":
+            start_month = start_month or 6
+            data = (index.month - start_month) % 12 // 3 + 1
+        case "month":
+            data = index.month
+        case "daytype":
+            weekend = weekend or (6, 7)
+            data = np.where((index.dayofweek + 1).isin(weekend), 2, 1)
+        case "weekday":
+            data = index.dayofweek + 1
+        case "hour":
+            data = index.hour + 1
+        case _:
+            raise ConditionKindError(
+                f"There is no available condition kind like {kind!r}."
+            )
+    return np.asarray(data, dtype=np.int8)
+
+
+class Calendar:
+
+    def __init__(self, start, end):
+        # `start`: date str in ISO 8601 format, included
+        # `end`: date str in ISO 8601 format, excluded
+        self.index = pd.date_range(
+            start=start,
+            end=end,
+            freq="h",
+            inclusive="left",
+        )
+        self._start = self.index[0].value
+        self._codes = {}
+
+    def get_codes(self, kind, start_month=None, weekend=None):
+        # `kind`, `start_month`, `weekend`: as for `compute_codes` function
+        # return: ndarray with codes for the whole calendar
+        match kind:
+            case "season":
+                key = (kind, start_month or 6)
+            case "daytype":
+                key = (kind, tuple(weekend or (6, 7)))
+            case _:
+                key = (kind,)
+        if key not in self._codes:
+            codes = compute_codes(
+                index=self.index,
+                kind=kind,
+                start_month=start_month,
+                weekend=weekend,
+            )
+            # Slices are views, so the shared codes must not be modified.
+            codes.flags.writeable = False
+            self._codes[key] = codes
+        return self._codes[key]
+
+    def get_positions(self, index):
+        # `index`: DatetimeIndex
+        # return: slice or ndarray with positions in the calendar, None if
+        # `index` is not fully covered by the calendar
+        if index.tz is not None:
+            return None
+        offsets = index.as_unit("ns").asi8 - self._start
+        if (offsets % _HOUR).any():
+            return None
+        positions = offsets // _HOUR
+        if len(positions) == 0:
+            return slice(0, 0)
+        if (positions.min() < 0) or (positions.max() >= len(self.index)):
+            return None
+        # Only strictly consecutive hours make a slice; a raw local-time
+        # index with a repeated hour spans the same range but is shifted.
+        if (np.diff(positions) == 1).all():
+            return slice(positions[0], positions[-1] + 1)
+        return positions
+
+
+_calendar = None
+
+
+def configure_calendar(start=CALENDAR_START, end=CALENDAR_END):
+    # `start`: date str in ISO 8601 format, included
+    # `end`: date str in ISO 8601 format, excluded
+    # return: Calendar
+    global _calendar
+    _calendar = Calendar(start=start, end=end)
+    return _calendar
+
+
+def get_calendar():
+    # return: Calendar shared by the whole process
+    return _calendar or configure_calendar()
+
+
+def get_codes(index, kind, start_month=None, weekend=None):
+    # `index`: DatetimeIndex
+    # `kind`, `start_month`, `weekend`: as for `compute_codes` function
+    # return: ndarray with 1-based integer codes
+    calendar = get_calendar()
+    positions = calendar.get_positions(index)
+    if positions is None:
+        return compute_codes(
+            index=index,
+            kind=kind,
+            start_month=start_month,
+            weekend=weekend,
+        )
+    codes = calendar.get_codes(
+        kind=kind,
+        start_month=start_month,
+        weekend=weekend,
+    )
+    return codes[positions]
+
+
+@cache
+def _make_holidays(country, first_year, last_year):
+    # `country`: str, country code
+    # `first_year`, `last_year`: int, both included
+    # return: dataframe with 'ds' and 'holiday' columns, shared by the
+    # whole process, so it must not be modified
+    # Prophet and its holidays are imported on first use.
+    from prophet.make_holidays import make_holidays_df
+
+    return make_holidays_df(
+        year_list=list(range(first_year, last_year + 1)),
+        country=country,
+    )
+
+
+def get_holidays(index, country, last_year=None):
+    # `index`: DatetimeIndex of training set
+    # `country`: str, country code
+    # `last_year`: int, included; if None -> the last year of the
+    # configured calendar
+    # return: dataframe with 'ds' and 'holiday' columns, the same holidays
+    # as generated by Prophet for `country`, from the first year of
+    # `index` up to `last_year`, ready to be passed to `prophet.Prophet`
+    # as holidays
+    if last_year is None:
+        last_year = get_calendar().index[-1].year
+    first_year = index.min().year
+    last_year = max(index.max().year, last_year)
+    holidays = _make_holidays(country, first_year, last_year)
+    # Prophet keeps only holidays generated for the training years, so
+    # holidays occurring only in later years are dropped.
+    in_training = holidays["ds"].dt.year.isin(np.unique(index.year))
+    names = holidays.loc[in_training, "holiday"].unique()
+    return holidays[holidays["holiday"].isin(names)]
+
+
+def extend_holidays(fit, index, country):
+    # `fit`: fitted prophet.Prophet with holidays from `get_holidays`
+    # function
+    # `index`: DatetimeIndex with dates to predict
+    # `country`: str, country code
+    # return: `fit`, or its shallow copy with holidays of `country` up to
+    # the last year of `index`, if the forecast goes past the holidays
+    # generated for fitting
+    history = pd.DatetimeIndex(fit.history["ds"])
+    covered = max(history.max().year, get_calendar().index[-1].year)
+    if index.max().year <= covered:
+        return fit
+    holidays = get_holidays(history, country, last_year=index.max().year)
+    later = holidays[holidays["ds"].dt.year > covered]
+    # Shallow copy shares fitted parameters and history with `fit`.
+    fit = copy(fit)
+    fit.holidays = pd.concat(
+        [fit.holidays, later.reindex(columns=fit.holidays.columns)],
+        ignore_index=True,
+    )
+    return fit
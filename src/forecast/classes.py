@@ -1,8 +1,14 @@
 from dataclasses import dataclass
 from dataclasses import field
+from typing import TYPE_CHECKING
 
 import pandas as pd
-import prophet as ph
+
+from forecast.spans import Spans
+
+
+if TYPE_CHECKING:
+    import prophet as ph
 
 
 @dataclass
@@ -11,7 +17,7 @@ class Period:
     mapping: dict
 
 
-@dataclass
+@dataclass(frozen=True)
 class Seasonality:
     kind: str
     mode: str
@@ -20,24 +26,43 @@ class Seasonality:
     conditions: tuple
 
 
-@dataclass
+@dataclass(frozen=True)
 class Shock:
     description: str
     frame: pd.DataFrame
 
 
-@dataclass
+@dataclass(frozen=True)
 class Regressor:
     description: str
-    span: pd.DatetimeIndex
+    span: Spans
     conditions: tuple
+    # Report of `features.get_coverage` the conditions were chosen from.
+    coverage: pd.DataFrame = field(default=None, repr=False)
 
 
-@dataclass
+@dataclass(frozen=True)
 class Model:
-    seasonalities: list = field(default_factory=list)
-    regressors: list = field(default_factory=list)
-    shocks: list = field(default_factory=list)
+    # Model is immutable, so it is changed with `dataclasses.replace`
+    # and unchanged parts are shared between the models.
+    seasonalities: tuple = ()
+    regressors: tuple = ()
+    shocks: tuple = ()
     country: str = None
-    fit: ph.Prophet = None
+    backend: str = "stan"
+    fit: "ph.Prophet" = None
     forecast: pd.DataFrame = None
+    _forecast: pd.DataFrame = field(default=None, repr=False)
+    # Timings of accessor methods and their phases, see `instruments`.
+    timings: tuple = field(default=(), repr=False)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    seasonalities: tuple = ()
+    shocks: tuple = ()
+    regressors: tuple = ()
+    country: str = None
+    tz: str = None
+    backend: str = "stan"
@@ -9,6 +9,19 @@ from forecast.classes import Period
 INDEX_NAME = "ds"
 EXOGENOUS_VARIABLE_NAME = "y"
 
+# For reading and writing time series.
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+CSV_INDEX_SUFFIX = ".index.npz"
+CSV_INDEX_BLOCK = 1024
+COMPRESSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".zip": "zip",
+    ".xz": "xz",
+    ".zst": "zstd",
+}
+SCENARIO_NAME = "scenario"
+
 # For ConditionAccessor.
 INDEX_TYPE = pd.DatetimeIndex
 SEASON = Period(
@@ -39,3 +52,29 @@ HOUR = Period(
     name="hour",
     mapping={h: str(h) for h in range(1, 25)},
 )
+
+# For ForecastAccessor.add_regressor, in order of preference.
+REGRESSOR_CONDITIONS = (
+    ("month", "weekday"),
+    ("month", "daytype"),
+    ("season", "weekday"),
+    ("season", "daytype"),
+    ("weekday",),
+    ("daytype",),
+)
+
+# For Calendar.
+CALENDAR_START = "2000-01-01"
+CALENDAR_END = "2061-01-01"
+
+# For prediction engines.
+NANOSECONDS_PER_DAY = 24 * 3600 * 10**9
+
+# For fitting backends.
+FITTING_BACKENDS = ("stan", "lstsq")
+LSTSQ_MAX_ITER = 100
+LSTSQ_TOL = 1e-10
+
+# For plotting.
+PLOT_FIGSIZE = (10, 6)
+PLOT_MAX_POINTS = 2000
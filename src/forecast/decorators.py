@@ -1,28 +1,45 @@
-from copy import deepcopy
+from dataclasses import replace
+from functools import partial
 from functools import wraps
 
 from forecast.classes import Model
+from forecast.instruments import phase
 
 
-def _work_on_copy(fun):
+def _work_on_copy(fun=None, *, deep=True):
+    # `deep`: bool, False for methods which do not modify data, then only
+    # a new DataFrame object sharing the data with the original is created
+    if fun is None:
+        return partial(_work_on_copy, deep=deep)
+
     @wraps(fun)
     def wrapper(self, *args, **kwargs):
         # Preserving references to the originals and creating copies for
-        # further modifications.
-        orig_obj, self._obj = self._obj, self._obj.copy()
-        orig_model, self.model = self.model, deepcopy(self.model)
+        # further modifications. Model is immutable, so it is not copied
+        # but replaced by the decorated function with a new one sharing
+        # unchanged parts with the original.
+        orig_obj, self._obj = self._obj, self._obj.copy(deep=deep)
+        orig_model = self.model
         # Instantiation of a new model object, if it has not existed so far.
         self.model = self.model or Model()
-        # Calling decorated function.
-        obj = fun(self, *args, **kwargs)
-        # Checking whether the newly created model instance has been modified.
-        if self.model != Model():
+        model = self.model
+        # Calling decorated function, timed with its nested phases.
+        with phase(fun.__qualname__) as frame:
+            obj = fun(self, *args, **kwargs)
+        # Checking whether the model has been replaced.
+        if self.model is not model:
             # Accessor is instantiated during first call on newly created
             # DataFrame. Due to this fact, newly created and modified
             # model has to be attributed just after creation.
-            obj.fcst.model = self.model
+            new_model = self.model
         else:
-            obj.fcst.model = orig_model
+            new_model = orig_model
+        if new_model is not None:
+            new_model = replace(
+                new_model,
+                timings=(*new_model.timings, *frame.records),
+            )
+        obj.fcst.model = new_model
         self._obj = orig_obj
         self.model = orig_model
         return obj
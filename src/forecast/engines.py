@@ -0,0 +1,102 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from forecast.constants import INDEX_NAME
+from forecast.constants import NANOSECONDS_PER_DAY
+from forecast.exceptions import PredictionEngineError
+from forecast.fitting import get_feature_names
+
+
+def _get_holiday_targets(fit, index):
+    # `fit`: fitted prophet.Prophet
+    # `index`: DatetimeIndex
+    # return: dict with names of holiday features as keys and lists of days
+    # since epoch as values
+    # Only years of the dates are used to build the holidays, so one date
+    # per year is enough.
+    years = pd.Series(pd.to_datetime(np.unique(index.year).astype(str), format="%Y"))
+    holidays = fit.construct_holiday_dataframe(years)
+    targets = defaultdict(list)
+    if holidays.empty:
+        return targets
+    # Holidays seen only in training have no dates, their features are 0.
+    holidays = holidays.dropna(subset=["ds"])
+    for row in holidays.itertuples():
+        day = pd.Timestamp(row.ds).normalize().value // NANOSECONDS_PER_DAY
+        try:
+            lower = int(getattr(row, "lower_window", 0))
+            upper = int(getattr(row, "upper_window", 0))
+        except ValueError:
+            lower, upper = 0, 0
+        for offset in range(lower, upper + 1):
+            sign = "+" if offset >= 0 else "-"
+            targets[f"{row.holiday}_delim_{sign}{abs(offset)}"].append(day + offset)
+    return targets
+
+
+def get_design_matrix(fit, future):
+    # `fit`: fitted prophet.Prophet
+    # `future`: dataframe with DatetimeIndex and columns with conditions and
+    # regressors, as returned by `features.get_future` function
+    # return: ndarray with features in the order of the fitted coefficients,
+    # the same as built by `prophet.Prophet.make_all_seasonality_features`
+    names = get_feature_names(fit)
+    positions = {name: position for position, name in enumerate(names)}
+    index = future.index.as_unit("ns")
+    X = np.zeros((len(index), len(names)))
+    # Days since epoch, computed the same way as in Prophet.
+    t = index.asi8 // 10**9 / (3600 * 24.0)
+    for name, props in fit.seasonalities.items():
+        start = positions[f"{name}_delim_1"]
+        for i in range(props["fourier_order"]):
+            x = t * np.pi * 2 * (i + 1) / props["period"]
+            X[:, start + 2 * i] = np.sin(x)
+            X[:, start + 2 * i + 1] = np.cos(x)
+        if props["condition_name"] is not None:
+            mask = ~future[props["condition_name"]].to_numpy(dtype=bool)
+            stop = start + 2 * props["fourier_order"]
+            X[mask, start:stop] = 0
+    days = index.asi8 // NANOSECONDS_PER_DAY
+    for name, targets in _get_holiday_targets(fit, index).items():
+        if name in positions:
+            X[:, positions[name]] = np.isin(days, targets)
+    for name, props in fit.extra_regressors.items():
+        values = future[name].to_numpy(dtype=float)
+        X[:, positions[name]] = (values - props["mu"]) / props["std"]
+    return X
+
+
+def predict_flat(fit, future):
+    # `fit`: fitted prophet.Prophet with flat growth
+    # `future`: dataframe, as for `get_design_matrix` function
+    # return: dataframe with point forecast and its components, matching
+    # `prophet.Prophet.predict` within floating-point tolerance
+    if fit.growth != "flat":
+        raise PredictionEngineError(
+            f"There is no available prediction engine for growth like {fit.growth!r}."
+        )
+    X = get_design_matrix(fit, future)
+    if X.shape[1] != fit.params["beta"].shape[1]:
+        raise PredictionEngineError(
+            f"Features do not match the {fit.params['beta'].shape[1]} "
+            f"fitted coefficients."
+        )
+    floor = fit.y_min if fit.scaling == "minmax" else 0.0
+    trend = np.nanmean(fit.params["m"]) * fit.y_scale + floor
+    terms = {}
+    for component in ("additive_terms", "multiplicative_terms"):
+        beta = fit.params["beta"] * fit.train_component_cols[component].to_numpy()
+        terms[component] = np.nanmean(X @ beta.T, axis=1)
+    terms["additive_terms"] *= fit.y_scale
+    trend = np.full(len(X), trend)
+    return pd.DataFrame(
+        {
+            INDEX_NAME: future.index,
+            "trend": trend,
+            **terms,
+            "yhat": trend * (1 + terms["multiplicative_terms"])
+            + terms["additive_terms"],
+        }
+    )
@@ -8,3 +8,15 @@ class SeasonalityModeError(Exception):
 
 class SeasonalityKindError(Exception):
     pass
+
+
+class FileFormatError(Exception):
+    pass
+
+
+class PredictionEngineError(Exception):
+    pass
+
+
+class FittingBackendError(Exception):
+    pass
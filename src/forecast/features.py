@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+from forecast.calendars import get_codes
+from forecast.constants import REGRESSOR_CONDITIONS
+
+
+def get_seasonality_features(index, model):
+    # `index`: DatetimeIndex
+    # `model`: Model
+    # return: dict, conditions of seasonalities with 'force' mode as keys
+    # and dataframes with dummies as values; each combination of
+    # conditions is computed only once
+    features = {}
+    for seasonality in model.seasonalities:
+        if (seasonality.mode == "force") and (seasonality.conditions is not None):
+            if seasonality.conditions not in features:
+                features[seasonality.conditions] = index.cond.get_conditions(
+                    seasonality.conditions
+                )
+    return features
+
+
+def get_regressor_features(index, model):
+    # `index`: DatetimeIndex
+    # `model`: Model
+    # return: dict, regressor descriptions as keys and dataframes with
+    # dummies aligned to `index` as values
+    features = {}
+    for regressor in model.regressors:
+        # Crosses with hours have many columns with few True values, so
+        # they are built sparse and only True values are placed.
+        hours = regressor.span.to_index()
+        conds = hours.cond.get_conditions(regressor.conditions, sparse=True)
+        # Dummies are placed at positions of the span in `index`, dates
+        # out of `index` are skipped.
+        positions = index.get_indexer(hours)
+        data = np.zeros((len(index), len(conds.columns)), dtype=bool, order="F")
+        for i, column in enumerate(conds.columns):
+            rows = positions[conds[column].array.sp_index.indices]
+            data[rows[rows >= 0], i] = True
+        features[regressor.description] = pd.DataFrame(
+            data=data,
+            index=index,
+            columns=regressor.description + "_" + conds.columns,
+            copy=False,
+        )
+    return features
+
+
+def get_coverage(span, in_training, candidates=REGRESSOR_CONDITIONS):
+    # `span`: DatetimeIndex
+    # `in_training`: boolean ndarray, True for dates of `span` in training
+    # `candidates`: tuple of tuples with combinations of conditions
+    # return: dataframe, one row per candidate with numbers of its
+    # combinations in and out of training and of those out of training
+    # never seen in training; the candidate is covered if there are none
+    # Codes of every kind are computed once and combined per candidate
+    # in mixed radix, so sets of combinations are boolean masks.
+    kinds = {kind for conds in candidates for kind in conds}
+    codes = {kind: get_codes(index=span, kind=kind).astype(np.intp) for kind in kinds}
+    dims = {kind: int(codes[kind].max(initial=0)) + 1 for kind in kinds}
+    records = []
+    for conds in candidates:
+        size = int(np.prod([dims[kind] for kind in conds]))
+        combined = np.ravel_multi_index(
+            [codes[kind] for kind in conds],
+            dims=[dims[kind] for kind in conds],
+        )
+        seen_in = np.zeros(size, dtype=bool)
+        seen_in[combined[in_training]] = True
+        seen_out = np.zeros(size, dtype=bool)
+        seen_out[combined[~in_training]] = True
+        missing = int((seen_out & ~seen_in).sum())
+        records.append(
+            {
+                "conditions": conds,
+                "in_training": int(seen_in.sum()),
+                "out_of_training": int(seen_out.sum()),
+                "missing": missing,
+                "covered": missing == 0,
+            }
+        )
+    return pd.DataFrame(data=records)
+
+
+def join_features(df, *features):
+    # `df`: dataframe
+    # `features`: dataframes indexed like `df`
+    # return: dataframe with all features joined in one pass, columns
+    # already present in `df` are not duplicated
+    features = [frame.drop(columns=df.columns, errors="ignore") for frame in features]
+    features = [frame for frame in features if not frame.columns.empty]
+    if not features:
+        return df
+    # Features are copied block by block into one array of the final
+    # width, so the joined frame holds them in a single block.
+    width = sum(len(frame.columns) for frame in features)
+    dtype = np.result_type(*(dtype for frame in features for dtype in frame.dtypes))
+    data = np.empty((len(df), width), dtype=dtype, order="F")
+    start = 0
+    for frame in features:
+        stop = start + len(frame.columns)
+        data[:, start:stop] = frame.to_numpy(dtype=dtype)
+        start = stop
+    joined = pd.DataFrame(
+        data=data,
+        index=df.index,
+        columns=pd.Index(np.concatenate([frame.columns for frame in features])),
+        copy=False,
+    )
+    return pd.concat([df, joined], axis=1)
+
+
+def slice_features(features, start, end):
+    # `features`: tuple of dicts returned by `get_seasonality_features`
+    # and `get_regressor_features` functions for a longer index
+    # `start`, `end`: Timestamps, both included
+    # return: tuple of dicts, as if computed for the index within the
+    # dates
+    seasonality_features, regressor_features = features
+    sliced = {}
+    for conditions, frame in seasonality_features.items():
+        frame = frame.loc[start:end]
+        # Only conditions present get dummies, the same way as done by
+        # `get_conditions` method.
+        sliced[conditions] = frame.loc[:, frame.any().to_numpy()]
+    return sliced, {
+        description: frame.loc[start:end]
+        for description, frame in regressor_features.items()
+    }
+
+
+def get_future(index, model, features=None):
+    # `index`: DatetimeIndex with dates to predict
+    # `model`: Model
+    # `features`: as for `ForecastAccessor.fit_model` method, for `index`;
+    # if None -> computed here
+    # return: dataframe with features of seasonalities with 'force' mode
+    # with conditions and regressors, ready for `prophet.Prophet.predict`
+    if features is None:
+        features = (
+            get_seasonality_features(index, model),
+            get_regressor_features(index, model),
+        )
+    seasonality_features, regressor_features = features
+    future = join_features(
+        pd.DataFrame(index=index),
+        *seasonality_features.values(),
+        *regressor_features.values(),
+    )
+    if model.fit is not None:
+        future = add_missing_conditions(future, model.fit)
+    return future
+
+
+def add_missing_conditions(future, fit):
+    # `future`: dataframe, as returned by `get_future` function
+    # `fit`: fitted prophet.Prophet
+    # return: dataframe with conditions seen in training and absent in
+    # `future` added as False
+    # Conditions seen in training may not occur in a short horizon,
+    # but Prophet requires all of them.
+    cond_names = [
+        props["condition_name"]
+        for props in fit.seasonalities.values()
+        if props["condition_name"] is not None
+    ]
+    missing = pd.Index(cond_names).difference(future.columns)
+    if missing.empty:
+        return future
+    return join_features(
+        future,
+        pd.DataFrame(data=False, index=future.index, columns=missing),
+    )
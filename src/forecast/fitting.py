@@ -0,0 +1,143 @@
+import dataclasses
+import logging
+from copy import copy
+
+import numpy as np
+
+from forecast.constants import LSTSQ_MAX_ITER
+from forecast.constants import LSTSQ_TOL
+from forecast.exceptions import FittingBackendError
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_feature_names(fit):
+    # `fit`: fitted prophet.Prophet
+    # return: Index with names of features matching the fitted coefficients
+    # Features of a single row are enough to get all the names.
+    features, _, _, _ = fit.make_all_seasonality_features(fit.history.iloc[:1])
+    return features.columns
+
+
+def get_warm_start_params(fit, feature_names):
+    # `fit`: fitted prophet.Prophet, the source of parameters
+    # `feature_names`: Index with names of features of the model to fit
+    # return: dict with initial parameters; coefficients are matched by
+    # feature names, features without a match start from zero
+    previous_names = get_feature_names(fit)
+    previous_beta = fit.params["beta"][0]
+    positions = previous_names.get_indexer(feature_names)
+    matched = positions >= 0
+    beta = np.zeros(len(feature_names))
+    beta[matched] = previous_beta[positions[matched]]
+    if not matched.all() or (len(previous_names) != len(feature_names)):
+        logger.info(
+            f"Layout of features changed, {matched.sum()} of "
+            f"{len(feature_names)} coefficients are warm-started."
+        )
+    return {
+        "k": float(fit.params["k"][0][0]),
+        "m": float(fit.params["m"][0][0]),
+        "sigma_obs": float(fit.params["sigma_obs"][0][0]),
+        "delta": fit.params["delta"][0],
+        "beta": beta,
+    }
+
+
+def fit_warm(model_, df, previous):
+    # `model_`: prophet.Prophet, not fitted yet
+    # `df`: dataframe with training set, as passed to `prophet.Prophet.fit`
+    # `previous`: fitted prophet.Prophet with the same or similar spec
+    # return: fitted `model_`
+    # Same steps as `prophet.Prophet.fit`, but with initial parameters
+    # taken from the previous fit.
+    model_inputs = model_.preprocess(df)
+    stan_init = dataclasses.asdict(model_.calculate_initial_params(model_inputs.K))
+    if model_.history["y"].min() == model_.history["y"].max():
+        # Nothing to optimize for a constant series.
+        model_.params = {name: np.array([value]) for name, value in stan_init.items()}
+        model_.params["sigma_obs"] = np.array([1e-9])
+        return model_
+    warm_init = get_warm_start_params(previous, model_inputs.X.columns)
+    if warm_init["delta"].shape != stan_init["delta"].shape:
+        warm_init["delta"] = stan_init["delta"]
+    stan_data = dataclasses.asdict(model_inputs)
+    model_.params = model_.stan_backend.fit(warm_init, stan_data)
+    model_.stan_fit = model_.stan_backend.stan_fit
+    # If no changepoints were requested, replace delta with 0s.
+    if len(model_.changepoints) == 0:
+        model_.params["k"] = model_.params["k"] + model_.params["delta"].reshape(-1)
+        model_.params["delta"] = np.zeros(model_.params["delta"].shape).reshape((-1, 1))
+    return model_
+
+
+def fit_lstsq(model_, df):
+    # `model_`: prophet.Prophet with flat growth, not fitted yet
+    # `df`: dataframe with training set, as passed to `prophet.Prophet.fit`
+    # return: fitted `model_`
+    # With flat growth and additive features Prophet's MAP problem is a
+    # ridge regression: offset `m` and coefficients `beta` have normal
+    # priors, so for a given `sigma_obs` they solve a linear system. The
+    # `sigma_obs` has a closed form for given residuals, so both are
+    # alternated until `sigma_obs` settles. `k` and `delta` do not affect
+    # the likelihood of flat trend, so their MAP is 0. This is the exact
+    # minimizer of the objective optimized by Stan, differences come only
+    # from the stopping tolerance of L-BFGS.
+    if model_.growth != "flat":
+        raise FittingBackendError(
+            f"There is no available fitting backend for growth like {model_.growth!r}."
+        )
+    model_inputs = model_.preprocess(df)
+    stan_init = dataclasses.asdict(model_.calculate_initial_params(model_inputs.K))
+    if model_.history["y"].min() == model_.history["y"].max():
+        # Nothing to optimize for a constant series.
+        model_.params = {name: np.array([value]) for name, value in stan_init.items()}
+        model_.params["sigma_obs"] = np.array([1e-9])
+        return model_
+    if np.any(model_inputs.s_m):
+        raise FittingBackendError(
+            "There is no available fitting backend for multiplicative features."
+        )
+    y = np.asarray(model_inputs.y, dtype=float)
+    T = len(y)
+    A = np.column_stack([np.ones(T), model_inputs.X.to_numpy(dtype=float)])
+    # Precisions of the priors: normal(0, 5) for `m` and normal(0, sigmas)
+    # for `beta`.
+    precision = np.concatenate(
+        [[1 / 5**2], 1 / np.asarray(model_inputs.sigmas, dtype=float) ** 2]
+    )
+    gram = A.T @ A
+    moment = A.T @ y
+    sigma2 = y.var() or 1.0
+    for _ in range(LSTSQ_MAX_ITER):
+        theta = np.linalg.solve(gram + np.diag(sigma2 * precision), moment)
+        rss = np.sum((y - A @ theta) ** 2)
+        # Root of -rss / sigma^3 + T / sigma + sigma / 0.5^2 = 0, the
+        # derivative over `sigma_obs` with half-normal(0, 0.5) prior.
+        previous, sigma2 = sigma2, (np.sqrt(T**2 + 16 * rss) - T) / 8
+        if abs(sigma2 - previous) <= LSTSQ_TOL * previous:
+            break
+    theta = np.linalg.solve(gram + np.diag(sigma2 * precision), moment)
+    # Parameters are shaped as returned by the Stan backend.
+    model_.params = {
+        "k": np.zeros((1, 1)),
+        "m": theta[:1].reshape(1, 1),
+        "delta": np.zeros((1, len(stan_init["delta"]))),
+        "sigma_obs": np.sqrt([[sigma2]]),
+        "beta": theta[1:].reshape(1, -1),
+        "trend": np.full((1, T), theta[0]),
+    }
+    return model_
+
+
+def predict(fit, df, intervals=False):
+    # `fit`: fitted prophet.Prophet
+    # `df`: dataframe, as passed to `prophet.Prophet.predict`
+    # `intervals`: bool, if False uncertainty intervals are not simulated
+    # return: dataframe with the forecast
+    if not intervals:
+        # Shallow copy shares fitted parameters and history with `fit`.
+        fit = copy(fit)
+        fit.uncertainty_samples = 0
+    return fit.predict(df)
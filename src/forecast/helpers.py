@@ -1,54 +1,379 @@
+import io
+from functools import cache
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
+from forecast.constants import CALENDAR_END
+from forecast.constants import CALENDAR_START
+from forecast.constants import COMPRESSIONS
+from forecast.constants import CSV_INDEX_BLOCK
+from forecast.constants import CSV_INDEX_SUFFIX
+from forecast.constants import DATE_FORMAT
 from forecast.constants import EXOGENOUS_VARIABLE_NAME
 from forecast.constants import INDEX_NAME
+from forecast.constants import SCENARIO_NAME
+from forecast.exceptions import FileFormatError
+from forecast.spans import Spans
+
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pcsv
+    from pyarrow import dataset as pds
+except ImportError:
+    pa = None
+
+
+_HOUR = pd.Timedelta(hours=1).value
+_CALENDAR_STOP = pd.Timestamp(CALENDAR_END).as_unit("ns").value
 
 
 def merge_spans(*spans):
     # `spans`: two-elements tuples consists start and end date str in ISO 8601 format
-    # return: pd.DatetimeIndex
-    data = []
-    for span in spans:
-        span = [pd.Timestamp(ds) for ds in span]
-        data.append(
-            pd.date_range(
-                start=span[0],
-                end=span[1] + pd.DateOffset(days=1),
-                freq="h",
-                inclusive="left",
-            ).to_series()
+    # return: pd.DatetimeIndex, overlapping spans are merged
+    return Spans.from_tuples(*spans).to_index()
+
+
+def normalize_index(df, limit_area=None):
+    # `df`: dataframe with naive hourly DatetimeIndex, one or many columns
+    # `limit_area`: str, as for `pandas.DataFrame.interpolate` method;
+    # 'inside' fills only gaps between values, so columns ending or
+    # starting earlier than the others are not extended
+    # return: dataframe
+    # Insert an empty index for the missing hour at the change to
+    # daylight saving time and average the values from repeated hours
+    # at the change from daylight saving time.
+    df = df.resample("h").mean()
+    # Filling in the value for the missing hour.
+    df = df.interpolate(limit_area=limit_area)
+    return df
+
+
+@cache
+def get_transitions(tz):
+    # `tz`: str, e.g. 'Europe/Warsaw'
+    # return: tuple of int64 ndarrays with UTC instants (ns) at which the
+    # UTC offset of `tz` changes and offsets (ns) in force from them on,
+    # over the calendar range
+    utc = pd.date_range(
+        start=CALENDAR_START,
+        end=CALENDAR_END,
+        freq="h",
+        tz="UTC",
+        inclusive="left",
+    ).as_unit("ns")
+    offsets = utc.tz_convert(tz).tz_localize(None).asi8 - utc.tz_localize(None).asi8
+    changes = np.concatenate([[0], np.flatnonzero(np.diff(offsets)) + 1])
+    return utc.asi8[changes], offsets[changes]
+
+
+def _get_offsets(utc, tz):
+    # `utc`: int64 ndarray with sorted UTC instants (ns)
+    # `tz`: str
+    # return: int64 ndarray with UTC offsets (ns) of `tz` at `utc`
+    instants, offsets = get_transitions(tz)
+    if (len(utc) == 0) or (instants[0] <= utc[0] and utc[-1] < _CALENDAR_STOP):
+        return offsets[np.searchsorted(instants, utc, side="right") - 1]
+    # Dates out of the calendar are converted by pandas.
+    aware = pd.DatetimeIndex(utc.astype("datetime64[ns]")).tz_localize("UTC")
+    return aware.tz_convert(tz).tz_localize(None).asi8 - utc
+
+
+def match_tzs(df, tzs):
+    # `df`: dataframe with naive hourly DatetimeIndex of local wall times
+    # `tzs`: iterable of str, e.g. ('Europe/Warsaw', 'Europe/Berlin')
+    # return: dict with time zones as keys and dataframes with aware
+    # DatetimeIndex as values; the hour skipped at the change to daylight
+    # saving time is dropped and the hour repeated at the change from
+    # daylight saving time gets the value of the wall time
+    # Aware index is built from every UTC hour between the ends of `df`,
+    # wall times are UTC plus offsets from the transition table, so no
+    # inference of ambiguous hours is needed.
+    first, last = df.index.min(), df.index.max()
+    matched = {}
+    for tz in tzs:
+        start = first.tz_localize(tz, ambiguous=True, nonexistent="shift_forward")
+        end = last.tz_localize(tz, ambiguous=False, nonexistent="shift_backward")
+        start = start.tz_convert("UTC").as_unit("ns").value
+        end = end.tz_convert("UTC").as_unit("ns").value
+        # Number of hours is computed in integers, `np.arange` with int64
+        # bounds computes the length in float64 and drops the last hour.
+        utc = start + np.arange((end - start) // _HOUR + 1, dtype=np.int64) * _HOUR
+        wall = pd.DatetimeIndex((utc + _get_offsets(utc, tz)).astype("datetime64[ns]"))
+        aware = (
+            pd.DatetimeIndex(utc.astype("datetime64[ns]"), name=df.index.name)
+            .tz_localize("UTC")
+            .tz_convert(tz)
         )
-    span = pd.concat(data).index
-    return span
+        matched[tz] = df.reindex(index=wall).set_axis(aware, axis=0)
+    return matched
 
 
 def match_tz(df, tz):
     # `df`: dataframe with naive DatetimeIndex
     # `tz`: str, e.g. 'Europe/Warsaw'
     # return: dataframe with aware DatetimeIndex
-    index = pd.date_range(
-        start=df.index.min(),
-        end=df.index.max(),
-        freq="h",
-        tz=tz,
-        name=df.index.name,
-    ).tz_localize(tz=None)
-    df = df.reindex(index=index)
-    df = df.tz_localize(
-        tz=tz,
-        ambiguous="infer",
-    )
-    return df
+    return match_tzs(df, (tz,))[tz]
+
 
+def _get_file_format(filepath, file_format=None):
+    # `filepath`: str or Path
+    # `file_format`: str, if None -> inferred from the file extension
+    # return: tuple of file format ('csv', 'parquet' or 'feather') and
+    # compression of CSV files (None if not compressed)
+    suffixes = [suffix.lower() for suffix in Path(filepath).suffixes]
+    compression = None
+    if suffixes and (suffixes[-1] in COMPRESSIONS):
+        compression = COMPRESSIONS[suffixes.pop()]
+    if file_format is None:
+        file_format = suffixes[-1].removeprefix(".") if suffixes else ""
+    match file_format.lower():
+        case "csv":
+            return "csv", compression
+        case "parquet" | "pq":
+            return "parquet", None
+        case "feather" | "arrow":
+            return "feather", None
+        case _:
+            raise FileFormatError(
+                f"There is no available file format like {file_format!r}."
+            )
 
-def read_time_series(input_filepath):
-    # `input_filepath`: str
+
+def _to_time_series(df):
+    # `df`: dataframe with timestamps in DatetimeIndex or in the first column
+    # and values in the next column
     # return: dataframe
-    df = pd.read_csv(
+    if isinstance(df.index, pd.DatetimeIndex):
+        df = df.reset_index()
+    df = df.iloc[:, :2]
+    df.columns = [INDEX_NAME, EXOGENOUS_VARIABLE_NAME]
+    df = df.astype({EXOGENOUS_VARIABLE_NAME: "float64"})
+    return df.set_index(INDEX_NAME)
+
+
+def _read_csv(input_filepath, date_format, engine):
+    if engine == "pyarrow":
+        table = pcsv.read_csv(
+            input_filepath,
+            read_options=pcsv.ReadOptions(
+                column_names=[INDEX_NAME, EXOGENOUS_VARIABLE_NAME],
+                skip_rows=1,
+            ),
+            convert_options=pcsv.ConvertOptions(
+                column_types={
+                    INDEX_NAME: pa.timestamp("ns"),
+                    EXOGENOUS_VARIABLE_NAME: pa.float64(),
+                },
+                timestamp_parsers=[date_format, pcsv.ISO8601],
+            ),
+        )
+        return table.to_pandas().set_index(INDEX_NAME)
+    return pd.read_csv(
         filepath_or_buffer=input_filepath,
         header=0,
         names=[INDEX_NAME, EXOGENOUS_VARIABLE_NAME],
         index_col=INDEX_NAME,
-        parse_dates=True,
+        parse_dates=[INDEX_NAME],
+        date_format=date_format,
+        dtype={EXOGENOUS_VARIABLE_NAME: "float64"},
+        engine=engine,
     )
+
+
+def _get_bounds(start, end):
+    # `start`, `end`: date str in ISO 8601 format or Timestamp, may be None
+    # return: tuple of Timestamps (or None) covering all dates selected by
+    # `.loc[start:end]`, partial date strings included
+    lower = None if start is None else pd.Timestamp(start)
+    if end is None:
+        upper = None
+    elif isinstance(end, str):
+        upper = pd.Period(end).end_time
+    else:
+        upper = pd.Timestamp(end)
+    return lower, upper
+
+
+def _get_csv_index(input_filepath, date_format, engine):
+    # `input_filepath`, `date_format`, `engine`: as for `read_time_series`
+    # return: dict with timestamps and byte offsets of every
+    # `CSV_INDEX_BLOCK`-th row, None if the file cannot be indexed; the
+    # index is kept in a sidecar file and rebuilt when the file changes
+    path = Path(input_filepath)
+    index_path = path.with_name(path.name + CSV_INDEX_SUFFIX)
+    stat = path.stat()
+    try:
+        with np.load(index_path) as index:
+            index = dict(index)
+        if (index["size"] == stat.st_size) and (index["mtime"] == stat.st_mtime_ns):
+            return index
+    except (OSError, KeyError, ValueError):
+        pass
+    data = path.read_bytes()
+    line_starts = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n")) + 1
+    line_starts = line_starts[line_starts < len(data)]
+    df = _read_csv(io.BytesIO(data), date_format=date_format, engine=engine)
+    # Only files with one row per line, sorted by dates, can be indexed.
+    if (len(df) != len(line_starts)) or not df.index.is_monotonic_increasing:
+        return None
+    rows = np.arange(0, len(df), CSV_INDEX_BLOCK)
+    index = {
+        "timestamps": df.index.as_unit("ns").asi8[rows],
+        "offsets": line_starts[rows],
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+    }
+    try:
+        with index_path.open("wb") as file:
+            np.savez(file, **index)
+    except OSError:
+        pass
+    return index
+
+
+def _read_csv_range(input_filepath, lower, upper, date_format, engine):
+    # `lower`, `upper`: Timestamps, may be None
+    # return: dataframe with at least all rows between `lower` and `upper`
+    index = _get_csv_index(input_filepath, date_format=date_format, engine=engine)
+    if index is None:
+        return _read_csv(input_filepath, date_format=date_format, engine=engine)
+    timestamps, offsets = index["timestamps"], index["offsets"]
+    first, last = 0, len(offsets)
+    if lower is not None:
+        first = max(np.searchsorted(timestamps, lower.value, side="left") - 1, 0)
+    if upper is not None:
+        last = np.searchsorted(timestamps, upper.value, side="right")
+    with open(input_filepath, "rb") as file:
+        header = file.read(offsets[0])
+        file.seek(offsets[first])
+        if last < len(offsets):
+            chunk = file.read(offsets[last] - offsets[first])
+        else:
+            chunk = file.read()
+    return _read_csv(io.BytesIO(header + chunk), date_format=date_format, engine=engine)
+
+
+def _read_parquet_range(input_filepath, lower, upper):
+    # `lower`, `upper`: Timestamps, may be None
+    # return: dataframe with at least all rows between `lower` and `upper`;
+    # row groups and partitions out of the range are skipped
+    if pa is None:
+        return _to_time_series(pd.read_parquet(input_filepath))
+    schema = pds.dataset(input_filepath, format="parquet").schema
+    fields = [field for field in schema if pa.types.is_timestamp(field.type)]
+    if not fields:
+        return _to_time_series(pd.read_parquet(input_filepath))
+    name, tz = fields[0].name, fields[0].type.tz
+    filters = []
+    if lower is not None:
+        filters.append((name, ">=", lower.tz_localize(tz)))
+    if upper is not None:
+        filters.append((name, "<=", upper.tz_localize(tz)))
+    return _to_time_series(pd.read_parquet(input_filepath, filters=filters))
+
+
+def read_time_series(
+    input_filepath,
+    file_format=None,
+    date_format=DATE_FORMAT,
+    engine=None,
+    start=None,
+    end=None,
+):
+    # `input_filepath`: str or Path
+    # `file_format`: str, one of: 'csv', 'parquet', 'feather'; if None ->
+    # inferred from the file extension, CSV files may be compressed
+    # `date_format`: str, format of dates in CSV files
+    # `engine`: str, CSV parser, one of: 'pyarrow', 'c', 'python'; if None ->
+    # 'pyarrow' if installed, otherwise 'c'
+    # `start`, `end`: date str in ISO 8601 format, limit the loaded dates
+    # the same way as `ForecastAccessor.limit_training_set`
+    # return: dataframe
+    file_format, compression = _get_file_format(input_filepath, file_format)
+    limited = (start is not None) or (end is not None)
+    lower, upper = _get_bounds(start, end)
+    match file_format:
+        case "csv":
+            engine = engine or ("pyarrow" if pa else "c")
+            # Byte offsets are known only for uncompressed files.
+            if limited and (compression is None):
+                df = _read_csv_range(
+                    input_filepath,
+                    lower=lower,
+                    upper=upper,
+                    date_format=date_format,
+                    engine=engine,
+                )
+            else:
+                df = _read_csv(input_filepath, date_format=date_format, engine=engine)
+        case "parquet":
+            if limited:
+                df = _read_parquet_range(input_filepath, lower=lower, upper=upper)
+            else:
+                df = _to_time_series(pd.read_parquet(input_filepath))
+        case "feather":
+            df = _to_time_series(pd.read_feather(input_filepath))
+    if limited:
+        df = df.loc[start:end]
     return df
+
+
+def write_time_series(df, output_filepath, file_format=None, float_precision=None):
+    # `df`: dataframe with DatetimeIndex, naive or aware
+    # `output_filepath`: str or Path
+    # `file_format`: str, one of: 'csv', 'parquet', 'feather'; if None ->
+    # inferred from the file extension, e.g. '.csv.gz' for compressed CSV
+    # `float_precision`: int, number of decimal places; if None -> full
+    # precision
+    file_format, compression = _get_file_format(output_filepath, file_format)
+    match file_format:
+        case "csv":
+            float_format = None
+            if float_precision is not None:
+                float_format = f"%.{float_precision}f"
+            df.to_csv(
+                path_or_buf=output_filepath,
+                float_format=float_format,
+                compression=compression,
+            )
+        case "parquet" | "feather":
+            if float_precision is not None:
+                df = df.round(float_precision)
+            # Dates are written as a typed column keeping the time zone.
+            df = df.reset_index()
+            if file_format == "parquet":
+                df.to_parquet(output_filepath, index=False)
+            else:
+                df.to_feather(output_filepath)
+
+
+def write_time_series_dataset(
+    dfs,
+    output_path,
+    file_format="parquet",
+    float_precision=None,
+):
+    # `dfs`: dict with scenario names as keys and dataframes as values
+    # `output_path`: str or Path, directory for 'parquet' format
+    # partitioned by scenario, otherwise a single file with the scenario
+    # column
+    # `file_format`: str, one of: 'csv', 'parquet', 'feather'
+    # `float_precision`: int, as for `write_time_series` function
+    df = pd.concat(dfs, names=[SCENARIO_NAME])
+    if float_precision is not None:
+        df = df.round(float_precision)
+    df = df.reset_index(level=SCENARIO_NAME)
+    if file_format == "parquet":
+        df.reset_index().to_parquet(
+            output_path,
+            partition_cols=[SCENARIO_NAME],
+            index=False,
+            # Partitions of the written scenarios are replaced, so reruns
+            # do not add duplicate files; other scenarios are kept.
+            existing_data_behavior="delete_matching",
+        )
+    else:
+        write_time_series(df, output_path, file_format=file_format)
@@ -0,0 +1,128 @@
+import logging
+import time
+import tracemalloc
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from functools import wraps
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Timing:
+    name: str
+    wall: float
+    cpu: float
+    # Bytes allocated at the peak over the memory at the start, None if
+    # `tracemalloc` is not tracing.
+    peak_memory: int
+    depth: int
+
+
+@dataclass
+class _Frame:
+    parent: "_Frame"
+    depth: int
+    # Highest traced memory seen by the frame before its children reset
+    # the peak.
+    peak: int = 0
+    records: list = field(default_factory=list)
+
+
+# Callbacks called with every Timing.
+_hooks: list[Callable[[Timing], None]] = []
+# Lists collecting Timings of every phase, one per active `instrument`.
+_collectors = ContextVar("collectors", default=())
+_current = ContextVar("current", default=None)
+
+
+def add_hook(hook):
+    # `hook`: callable called with Timing after every phase
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    # `hook`: callable, as passed to `add_hook` function
+    _hooks.remove(hook)
+
+
+@contextmanager
+def phase(name):
+    # `name`: str, e.g. 'ForecastAccessor.fit_model' or 'optimize'
+    # return: context manager yielding the frame, whose records hold
+    # Timings of the phase and of all nested phases once it exits
+    # Only clocks are read, unless `tracemalloc` is tracing, so phases
+    # are cheap enough to stay on.
+    parent = _current.get()
+    frame = _Frame(parent=parent, depth=0 if parent is None else parent.depth + 1)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        start_memory, peak = tracemalloc.get_traced_memory()
+        if parent is not None:
+            parent.peak = max(parent.peak, peak)
+        tracemalloc.reset_peak()
+    token = _current.set(frame)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield frame
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        _current.reset(token)
+        peak_memory = None
+        if tracing:
+            frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+            if parent is not None:
+                parent.peak = max(parent.peak, frame.peak)
+            peak_memory = frame.peak - start_memory
+        timing = Timing(
+            name=name,
+            wall=wall,
+            cpu=cpu,
+            peak_memory=peak_memory,
+            depth=frame.depth,
+        )
+        frame.records.append(timing)
+        if parent is not None:
+            parent.records.extend(frame.records)
+        for collector in _collectors.get():
+            collector.append(timing)
+        for hook in _hooks:
+            hook(timing)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"{'  ' * timing.depth}{name}: wall {wall:.4f} s, cpu {cpu:.4f} s"
+                + (f", peak {peak_memory} B" if tracing else "")
+            )
+
+
+def timed(fun):
+    # Decorator recording the calls of `fun` as phases.
+    @wraps(fun)
+    def wrapper(*args, **kwargs):
+        with phase(fun.__qualname__):
+            return fun(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def instrument(memory=False):
+    # `memory`: bool, if True `tracemalloc` is traced within the block, so
+    # peak memory is recorded at the cost of slower allocations
+    # return: context manager yielding a list, filled with Timings of all
+    # phases finished within the block
+    records = []
+    token = _collectors.set((*_collectors.get(), records))
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield records
+    finally:
+        if started:
+            tracemalloc.stop()
+        _collectors.reset(token)
@@ -0,0 +1,119 @@
+from pathlib import Path
+
+import pandas as pd
+
+from forecast.calendars import extend_holidays
+from forecast.constants import EXOGENOUS_VARIABLE_NAME
+from forecast.constants import INDEX_NAME
+from forecast.features import add_missing_conditions
+from forecast.features import get_future
+from forecast.features import get_regressor_features
+from forecast.features import get_seasonality_features
+from forecast.fitting import predict
+from forecast.helpers import match_tz
+from forecast.helpers import normalize_index
+from forecast.helpers import write_time_series
+from forecast.pools import imap_unordered
+from forecast.pools import share_array
+from forecast.scenarios import apply_scenario
+
+
+def to_wide(df, key, value=EXOGENOUS_VARIABLE_NAME):
+    # `df`: long dataframe with DatetimeIndex, series names in `key`
+    # column and values in `value` column
+    # `key`: str
+    # `value`: str
+    # return: wide dataframe with one column per series
+    wide = df.reset_index().pivot(index=INDEX_NAME, columns=key, values=value)
+    wide.columns.name = None
+    return wide
+
+
+def _run_series(shared, item):
+    values, index, model, features, future, tz = shared
+    position, name = item
+    # Only the column of the series is copied out of the shared memory.
+    ts = pd.DataFrame(
+        data={EXOGENOUS_VARIABLE_NAME: values.attach()[:, position].copy()},
+        index=index,
+    )
+    # Model spec is attributed to the training set the same way as done by
+    # the accessor methods.
+    ts.fcst.model = model
+    fit = ts.fcst.fit_model(features=features).fcst.model.fit
+    future = add_missing_conditions(future, fit)
+    if model.country:
+        fit = extend_holidays(fit, future.index, model.country)
+    _forecast = predict(fit, future.reset_index())
+    forecast = _forecast[[INDEX_NAME, "yhat"]].set_index(INDEX_NAME)
+    if tz:
+        forecast = match_tz(df=forecast, tz=tz)
+    return name, forecast
+
+
+def run_series(
+    ts,
+    scenario,
+    number_of_forecast_years,
+    first_day_of_forecast,
+    include_training_years,
+    key=None,
+    output_directory=None,
+    suffix=".csv",
+    max_workers=None,
+):
+    # `ts`: wide dataframe with training sets, one column per series, or
+    # long dataframe with series names in `key` column; already limited
+    # `scenario`: Scenario, the same for all series
+    # `number_of_forecast_years`, `first_day_of_forecast`,
+    # `include_training_years`: as for `ForecastAccessor.predict` method
+    # `key`: str, column with series names of long `ts`; if None -> `ts`
+    # is wide
+    # `output_directory`: str or Path, if given each forecast is written
+    # there as '<series name><suffix>' as soon as it is ready
+    # `suffix`: str, file extension selecting the format, e.g. '.csv',
+    # '.csv.gz', '.parquet', '.feather'
+    # `max_workers`: int, number of processes; if None -> number of CPUs
+    # return: generator of (series name, dataframe with forecast) tuples
+    # in order of completion
+    if key is not None:
+        ts = to_wide(ts, key=key)
+    # Series of a panel may end earlier than others, their missing ends
+    # stay missing instead of being filled with their last values, and
+    # are skipped in fitting.
+    ts = normalize_index(ts, limit_area="inside")
+    # All series share the index, so the model spec and the features are
+    # built once, on the first series.
+    first = ts.iloc[:, :1].set_axis([EXOGENOUS_VARIABLE_NAME], axis=1)
+    model = apply_scenario(first, scenario).fcst.model
+    features = (
+        get_seasonality_features(ts.index, model),
+        get_regressor_features(ts.index, model),
+    )
+    first_day_of_forecast = pd.Timestamp(first_day_of_forecast)
+    index = pd.date_range(
+        start=ts.index.min() if include_training_years else first_day_of_forecast,
+        end=first_day_of_forecast
+        + pd.offsets.YearEnd(number_of_forecast_years)
+        + pd.DateOffset(days=1),
+        freq="h",
+        name=INDEX_NAME,
+        inclusive="left",
+    )
+    future = get_future(index, model)
+    items = list(enumerate(ts.columns))
+    # Training data is kept in shared memory instead of being pickled to
+    # every worker process.
+    with share_array(ts.to_numpy(dtype="float64")) as values:
+        for name, forecast in imap_unordered(
+            _run_series,
+            items,
+            shared=(values, ts.index, model, features, future, scenario.tz),
+            max_workers=max_workers,
+        ):
+            if output_directory is not None:
+                write_time_series(
+                    df=forecast,
+                    output_filepath=Path(output_directory) / f"{name}{suffix}",
+                )
+            yield name, forecast
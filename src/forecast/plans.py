@@ -0,0 +1,193 @@
+from dataclasses import dataclass
+from dataclasses import field
+
+import numpy as np
+import pandas as pd
+
+from forecast.constants import EXOGENOUS_VARIABLE_NAME
+from forecast.helpers import normalize_index
+from forecast.instruments import phase
+
+
+_HOUR = pd.Timedelta(hours=1)
+
+
+@dataclass(frozen=True)
+class Step:
+    method: str
+    kwargs: dict = field(default_factory=dict)
+
+
+class LazyForecast:
+
+    def __init__(self, obj, steps=()):
+        # `obj`: dataframe, the plan is executed on
+        # `steps`: tuple of Step
+        self._obj = obj
+        self.steps = steps
+
+    def _record(self, method, **kwargs):
+        # return: LazyForecast with a new step appended
+        return LazyForecast(self._obj, (*self.steps, Step(method, kwargs)))
+
+    def limit_training_set(self, start_date, end_date):
+        return self._record(
+            "limit_training_set",
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+    def normalize_index(self):
+        return self._record("normalize_index")
+
+    def add_seasonality(self, kind, mode, conditions=None):
+        return self._record(
+            "add_seasonality",
+            kind=kind,
+            mode=mode,
+            conditions=conditions,
+        )
+
+    def add_yearly_seasonality(self, **kwargs):
+        return self.add_seasonality(kind="yearly", **kwargs)
+
+    def add_weekly_seasonality(self, **kwargs):
+        return self.add_seasonality(kind="weekly", **kwargs)
+
+    def add_daily_seasonality(self, **kwargs):
+        return self.add_seasonality(kind="daily", **kwargs)
+
+    def add_seasonalities(self, *seasonalities):
+        plan = self
+        for seasonality in seasonalities:
+            plan = plan.add_seasonality(**seasonality)
+        return plan
+
+    def add_shock(self, description, spans):
+        return self._record("add_shock", description=description, spans=spans)
+
+    def add_shocks(self, *shocks):
+        plan = self
+        for shock in shocks:
+            plan = plan.add_shock(**shock)
+        return plan
+
+    def add_regressor(self, description, spans):
+        return self._record("add_regressor", description=description, spans=spans)
+
+    def add_regressors(self, *regressors):
+        plan = self
+        for regressor in regressors:
+            plan = plan.add_regressor(**regressor)
+        return plan
+
+    def add_country_holidays(self, country):
+        return self._record("add_country_holidays", country=country)
+
+    def set_backend(self, backend):
+        return self._record("set_backend", backend=backend)
+
+    def optimize(self):
+        # return: tuple of Step
+        # Limits of training set are pushed down before normalization of
+        # the index, so only the limited part of the data is resampled.
+        # The pushed down limit is widened to the nearest values outside
+        # the dates, so the edges are interpolated the same way as on the
+        # whole data, and the exact limit is applied just after
+        # normalization. Steps depending on the index, i.e. regressors,
+        # stop the limit from being pushed down.
+        steps = []
+        for step in self.steps:
+            if step.method == "limit_training_set":
+                for j in range(len(steps) - 1, -1, -1):
+                    method = steps[j].method
+                    if method == "normalize_index":
+                        steps.insert(j, Step("limit_with_margin", step.kwargs))
+                        break
+                    if method in ("add_regressor", "limit_training_set"):
+                        break
+            steps.append(step)
+        return tuple(steps)
+
+    def collect(self):
+        # return: dataframe with all recorded steps executed
+        # Steps changing the data are run on the frames directly, each of
+        # them already returns a new frame, so no intermediate copies are
+        # made; steps changing the model are run by the accessor.
+        df = self._obj
+        model = df.fcst.model
+        for step in self.optimize():
+            if step.method in _FRAME_STEPS:
+                with phase(f"LazyForecast.{step.method}"):
+                    df = _FRAME_STEPS[step.method](df, **step.kwargs)
+                df.fcst.model = model
+            else:
+                df = getattr(df.fcst, step.method)(**step.kwargs)
+                model = df.fcst.model
+        return df
+
+    def fit_model(self, **kwargs):
+        # `kwargs`: kwargs for `ForecastAccessor.fit_model` method
+        # return: dataframe
+        return self.collect().fcst.fit_model(**kwargs)
+
+    def predict(self, fit_kwargs=None, **kwargs):
+        # `fit_kwargs`: dict with kwargs for `ForecastAccessor.fit_model`
+        # method
+        # `kwargs`: kwargs for `ForecastAccessor.predict` method
+        # return: dataframe
+        return self.fit_model(**(fit_kwargs or {})).fcst.predict(**kwargs)
+
+    def write_time_series(
+        self,
+        output_filepath,
+        file_format=None,
+        float_precision=None,
+        fit_kwargs=None,
+        **kwargs,
+    ):
+        # `output_filepath`, `file_format`, `float_precision`: as for
+        # `ForecastAccessor.write_time_series` method
+        # `fit_kwargs`: as for `predict` method
+        # `kwargs`: kwargs for `ForecastAccessor.predict` method
+        # return: dataframe, the forecast is written as a side effect
+        df = self.predict(fit_kwargs=fit_kwargs, **kwargs)
+        df.fcst.write_time_series(
+            output_filepath=output_filepath,
+            file_format=file_format,
+            float_precision=float_precision,
+        )
+        return df
+
+
+def _limit(df, start_date, end_date):
+    # `df`: dataframe
+    # `start_date`, `end_date`: as for `ForecastAccessor.limit_training_set`
+    # return: dataframe, a slice of `df`
+    return df.loc[start_date:end_date]
+
+
+def _limit_with_margin(df, start_date, end_date):
+    # `df`: dataframe with raw, sorted index
+    # `start_date`, `end_date`: as for `ForecastAccessor.limit_training_set`
+    # return: dataframe limited to the given dates widened to the nearest
+    # values outside them, whole hours included, which are the anchors of
+    # interpolation of the edges by `normalize_index` function
+    start, stop, _ = df.index.slice_indexer(start_date, end_date).indices(len(df))
+    if start >= stop:
+        return df
+    valid = df[EXOGENOUS_VARIABLE_NAME].notna().to_numpy()
+    before = np.flatnonzero(valid[:start])
+    after = np.flatnonzero(valid[stop:])
+    first = df.index[before[-1]].floor("h") if len(before) else df.index[0]
+    last = df.index[-1]
+    if len(after):
+        last = df.index[stop + after[0]].floor("h") + _HOUR - pd.Timedelta(1)
+    return df.loc[first:last]
+
+
+_FRAME_STEPS = {
+    "limit_training_set": _limit,
+    "limit_with_margin": _limit_with_margin,
+    "normalize_index": normalize_index,
+}
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from forecast.constants import INDEX_NAME
+from forecast.constants import PLOT_FIGSIZE
+from forecast.constants import PLOT_MAX_POINTS
+
+
+def get_window(df, start=None, end=None):
+    # `df`: dataframe with sorted dates in 'ds' column
+    # `start`, `end`: date str in ISO 8601 format or Timestamp, both
+    # included; if None -> the window is not limited on that side
+    # return: dataframe, a positional slice of `df`
+    # Timestamps are searched by the Series, numpy cannot compare them
+    # with datetime64 values.
+    ds = df[INDEX_NAME]
+    first = 0 if start is None else ds.searchsorted(pd.Timestamp(start), side="left")
+    last = len(ds) if end is None else ds.searchsorted(pd.Timestamp(end), side="right")
+    return df.iloc[first:last]
+
+
+def downsample(df, columns, max_points=PLOT_MAX_POINTS):
+    # `df`: dataframe with rows in order of drawing
+    # `columns`: list of names of columns to preserve the shape of
+    # `max_points`: int, about the number of rows kept
+    # return: dataframe with the rows of `df` holding minimum and maximum
+    # of every column within each of `max_points // 2` buckets of
+    # consecutive rows, so peaks and dips survive unlike in plain
+    # decimation
+    n = len(df)
+    if n <= max_points:
+        return df
+    buckets = max(max_points // 2, 1)
+    bucket = np.arange(n) * buckets // n
+    starts = np.searchsorted(bucket, np.arange(buckets), "left")
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    for column in columns:
+        values = df[column].to_numpy(dtype=float)
+        # Missing values sort last, so they are never picked as extremes.
+        minima = np.lexsort((np.where(np.isnan(values), np.inf, values), bucket))
+        maxima = np.lexsort((np.where(np.isnan(values), np.inf, -values), bucket))
+        keep[minima[starts]] = True
+        keep[maxima[starts]] = True
+    return df.iloc[np.flatnonzero(keep)]
+
+
+def _draw_forecast(ax, forecast, history, max_points):
+    history = downsample(history, ["y"], max_points=max_points)
+    ax.plot(history[INDEX_NAME], history["y"], "k.", markersize=2, label="Observed")
+    columns = ["yhat"]
+    intervals = "yhat_lower" in forecast
+    if intervals:
+        columns += ["yhat_lower", "yhat_upper"]
+    forecast = downsample(forecast, columns, max_points=max_points)
+    ax.plot(
+        forecast[INDEX_NAME],
+        forecast["yhat"],
+        ls="-",
+        c="#0072B2",
+        label="Forecast",
+    )
+    if intervals:
+        ax.fill_between(
+            forecast[INDEX_NAME],
+            forecast["yhat_lower"],
+            forecast["yhat_upper"],
+            color="#0072B2",
+            alpha=0.2,
+        )
+    ax.grid(True, which="major", c="gray", ls="-", lw=1, alpha=0.2)
+    ax.set_xlabel(INDEX_NAME)
+    ax.set_ylabel("y")
+    ax.legend(loc="upper left")
+
+
+def plot_forecast(
+    forecast,
+    history,
+    output_filepath=None,
+    start=None,
+    end=None,
+    components=(),
+    max_points=PLOT_MAX_POINTS,
+):
+    # `forecast`: dataframe returned by `prophet.Prophet.predict`
+    # `history`: dataframe with 'ds' and 'y' columns, e.g. history of the
+    # fitted prophet.Prophet
+    # `output_filepath`: str or Path, the format is taken from the
+    # extension, e.g. '.png', '.svg'; if None -> the plot is shown
+    # `start`, `end`: as for `get_window` function
+    # `components`: tuple of names of columns of `forecast` drawn in
+    # separate panels, e.g. ('trend', 'additive_terms')
+    # `max_points`: int, as for `downsample` function
+    # return: matplotlib Figure
+    forecast = get_window(forecast, start=start, end=end)
+    history = get_window(history, start=start, end=end)
+    nrows = 1 + len(components)
+    figsize = (PLOT_FIGSIZE[0], PLOT_FIGSIZE[1] + 3 * len(components))
+    if output_filepath is None:
+        from matplotlib import pyplot as plt
+
+        fig, axes = plt.subplots(nrows=nrows, figsize=figsize, squeeze=False)
+    else:
+        # Figure without pyplot needs no display and no GUI backend.
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=figsize)
+        axes = fig.subplots(nrows=nrows, squeeze=False)
+    axes = axes[:, 0]
+    _draw_forecast(axes[0], forecast, history, max_points)
+    for ax, component in zip(axes[1:], components):
+        frame = downsample(forecast, [component], max_points=max_points)
+        ax.plot(frame[INDEX_NAME], frame[component], ls="-", c="#0072B2")
+        ax.grid(True, which="major", c="gray", ls="-", lw=1, alpha=0.2)
+        ax.set_ylabel(component)
+    fig.tight_layout()
+    if output_filepath is None:
+        plt.show()
+    else:
+        fig.savefig(output_filepath)
+    return fig
@@ -0,0 +1,79 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+# Data shared by all tasks of a worker process, sent once per process
+# instead of once per task.
+_shared = None
+# Shared memory blocks attached by the process, kept open as long as
+# arrays built on them may be used.
+_attached: dict[str, SharedMemory] = {}
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    # Picklable handle of an ndarray kept in shared memory.
+    name: str
+    shape: tuple
+    dtype: str
+
+    def attach(self):
+        # return: read-only ndarray backed by the shared memory
+        if self.name not in _attached:
+            # Memory is owned and released by the creating process.
+            _attached[self.name] = SharedMemory(name=self.name, track=False)
+        array = np.ndarray(
+            self.shape,
+            dtype=self.dtype,
+            buffer=_attached[self.name].buf,
+        )
+        array.flags.writeable = False
+        return array
+
+
+@contextmanager
+def share_array(array):
+    # `array`: ndarray
+    # return: context manager yielding SharedArray with a copy of `array`,
+    # the shared memory is released on exit
+    memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+    try:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+        yield SharedArray(
+            name=memory.name,
+            shape=array.shape,
+            dtype=array.dtype.str,
+        )
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def _initialize(shared):
+    global _shared
+    _shared = shared
+
+
+def _call(fun, item):
+    return fun(_shared, item)
+
+
+def imap_unordered(fun, items, shared=None, max_workers=None):
+    # `fun`: module-level function called as `fun(shared, item)`
+    # `items`: iterable of picklable arguments
+    # `shared`: picklable object sent once to every worker process
+    # `max_workers`: int, number of processes; if None -> number of CPUs
+    # return: generator of results in order of completion
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_initialize,
+        initargs=(shared,),
+    ) as executor:
+        futures = [executor.submit(_call, fun, item) for item in items]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from forecast.helpers import write_time_series
+from forecast.pools import imap_unordered
+
+
+def apply_scenario(ts, scenario):
+    # `ts`: dataframe with training set
+    # `scenario`: Scenario
+    # return: dataframe with model built according to the scenario
+    ts = ts.fcst.add_seasonalities(*scenario.seasonalities)
+    ts = ts.fcst.add_shocks(*scenario.shocks)
+    ts = ts.fcst.add_regressors(*scenario.regressors)
+    if scenario.country:
+        ts = ts.fcst.add_country_holidays(scenario.country)
+    ts = ts.fcst.set_backend(scenario.backend)
+    return ts
+
+
+def run_scenario(ts, scenario, **predict_kwargs):
+    # `ts`: dataframe with training set
+    # `scenario`: Scenario
+    # `predict_kwargs`: kwargs for `ForecastAccessor.predict` method
+    # return: dataframe with fitted model and forecast
+    ts = apply_scenario(ts, scenario)
+    ts = ts.fcst.fit_model()
+    ts = ts.fcst.predict(**predict_kwargs)
+    if scenario.tz:
+        ts = ts.fcst.match_tz(scenario.tz)
+    return ts
+
+
+def _run_scenario(ts, task):
+    scenario, predict_kwargs = task
+    ts = run_scenario(ts, scenario, **predict_kwargs)
+    return scenario.name, ts.fcst.model.forecast
+
+
+def run_scenarios(
+    ts,
+    scenarios,
+    number_of_forecast_years,
+    first_day_of_forecast,
+    include_training_years,
+    output_directory=None,
+    suffix=".csv",
+    max_workers=None,
+):
+    # `ts`: dataframe with training set, already limited and normalized
+    # `scenarios`: iterable of Scenario
+    # `number_of_forecast_years`, `first_day_of_forecast`,
+    # `include_training_years`: as for `ForecastAccessor.predict` method
+    # `output_directory`: str or Path, if given each forecast is written
+    # there as '<scenario name><suffix>' as soon as it is ready
+    # `suffix`: str, file extension selecting the format, e.g. '.csv',
+    # '.csv.gz', '.parquet', '.feather'
+    # `max_workers`: int, number of processes; if None -> number of CPUs
+    # return: generator of (scenario name, dataframe with forecast) tuples
+    # in order of completion
+    predict_kwargs = {
+        "number_of_forecast_years": number_of_forecast_years,
+        "first_day_of_forecast": first_day_of_forecast,
+        "include_training_years": include_training_years,
+    }
+    tasks = [(scenario, predict_kwargs) for scenario in scenarios]
+    # Training set is sent once to every worker process.
+    for name, forecast in imap_unordered(
+        _run_scenario,
+        tasks,
+        shared=ts,
+        max_workers=max_workers,
+    ):
+        if output_directory is not None:
+            write_time_series(
+                df=forecast,
+                output_filepath=Path(output_directory) / f"{name}{suffix}",
+            )
+        yield name, forecast
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+_HOUR = pd.Timedelta(hours=1).value
+
+
+def parse_spans(*spans):
+    # `spans`: two-elements tuples consists start and end date str in ISO 8601 format
+    # return: tuple of DatetimeIndexes with starts and ends of the spans,
+    # in the given order
+    starts = pd.DatetimeIndex([pd.Timestamp(span[0]) for span in spans])
+    ends = pd.DatetimeIndex([pd.Timestamp(span[1]) for span in spans])
+    return starts, ends
+
+
+@dataclass(frozen=True, eq=False)
+class Spans:
+    # Sorted, non-overlapping hourly intervals kept as int64 nanoseconds,
+    # starts included and stops excluded. Memory is proportional to the
+    # number of intervals, hours are materialized only by `to_index`.
+    starts: np.ndarray
+    stops: np.ndarray
+
+    @classmethod
+    def merged(cls, starts, stops):
+        # `starts`, `stops`: int64 ndarrays, in any order, may overlap
+        # return: Spans with overlapping and adjacent intervals merged
+        starts = np.asarray(starts, dtype=np.int64)
+        stops = np.asarray(stops, dtype=np.int64)
+        keep = stops > starts
+        starts, stops = starts[keep], stops[keep]
+        if len(starts) == 0:
+            return cls(starts=starts, stops=stops)
+        order = np.argsort(starts, kind="stable")
+        starts, stops = starts[order], stops[order]
+        reach = np.maximum.accumulate(stops)
+        first = np.ones(len(starts), dtype=bool)
+        first[1:] = starts[1:] > reach[:-1]
+        return cls(
+            starts=starts[first],
+            stops=np.maximum.reduceat(stops, np.flatnonzero(first)),
+        )
+
+    @classmethod
+    def from_tuples(cls, *spans):
+        # `spans`: as for `parse_spans` function, whole end days included
+        # return: Spans
+        starts, ends = parse_spans(*spans)
+        stops = ends + pd.DateOffset(days=1)
+        return cls.merged(starts.as_unit("ns").asi8, stops.as_unit("ns").asi8)
+
+    @property
+    def hours(self):
+        # return: int, number of hours covered
+        return int((-(-(self.stops - self.starts) // _HOUR)).sum())
+
+    def _contains(self, values):
+        # `values`: int64 ndarray, nanoseconds
+        # return: boolean ndarray
+        positions = np.searchsorted(self.starts, values, side="right") - 1
+        inside = positions >= 0
+        inside[inside] = values[inside] < self.stops[positions[inside]]
+        return inside
+
+    def contains(self, index):
+        # `index`: naive DatetimeIndex
+        # return: boolean ndarray, True for dates within the spans
+        return self._contains(index.as_unit("ns").asi8)
+
+    def intersection(self, other):
+        # `other`: Spans
+        # return: Spans covered by both
+        bounds = np.unique(
+            np.concatenate([self.starts, self.stops, other.starts, other.stops])
+        )
+        lefts, rights = bounds[:-1], bounds[1:]
+        inside = self._contains(lefts) & other._contains(lefts)
+        return Spans.merged(lefts[inside], rights[inside])
+
+    def hours_in(self, index):
+        # `index`: naive DatetimeIndex, e.g. of training set
+        # return: int, number of dates of `index` within the spans
+        if not index.is_monotonic_increasing:
+            return int(self.contains(index).sum())
+        values = index.as_unit("ns").asi8
+        return int(
+            (
+                np.searchsorted(values, self.stops, side="left")
+                - np.searchsorted(values, self.starts, side="left")
+            ).sum()
+        )
+
+    def to_index(self):
+        # return: DatetimeIndex with every hour of the spans, sorted and
+        # without duplicates
+        lengths = -(-(self.stops - self.starts) // _HOUR)
+        total = int(lengths.sum())
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        values = np.repeat(self.starts, lengths) + offsets * _HOUR
+        return pd.DatetimeIndex(values.astype("datetime64[ns]"))